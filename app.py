@@ -1,21 +1,31 @@
-from flask import Flask, render_template_string, request, jsonify
-from fetch_process_upload import process_website
-from pymongo import MongoClient
+from flask import Flask, request, jsonify, g, Response, stream_with_context
+import metrics
+import data_access
+import export
+from fragment_cache import FragmentCache
+from topics import topic_label
+import os
 import threading
 import random
 from urllib.parse import urlparse
-from datetime import datetime
+from dates import format_date, parse_range, to_day
+import time
 
 app = Flask(__name__)
 
-# MongoDB config
-MONGO_URI = "mongodb://localhost:27017"
-DB_NAME = "insightbot"
-COLLECTION_NAME = "articles"
-
-client = MongoClient(MONGO_URI)
-db = client[DB_NAME]
-collection = db[COLLECTION_NAME]
+# Article store: MongoDB through data_access.py (pooled client, projections,
+# indexes), or a read-only SQLite snapshot when INSIGHTBOT_SNAPSHOT is set.
+# Both modules expose the same query functions.
+SNAPSHOT_MODE = bool(os.environ.get("INSIGHTBOT_SNAPSHOT"))
+if SNAPSHOT_MODE:
+    import snapshot as store
+    print(f"🔹 Serving read-only snapshot {store.SNAPSHOT_PATH}")
+else:
+    store = data_access
+    try:
+        data_access.ensure_indexes()
+    except Exception as e:
+        print(f"⚠️ Could not ensure MongoDB indexes at startup: {e}")
 
 HTML_TEMPLATE = """
 <!DOCTYPE html>
@@ -326,26 +336,55 @@ HTML_TEMPLATE = """
                 <input type="text" name="site_url" placeholder="Enter website URL (e.g. https://www.techradar.com/)" value="{{ site_url or '' }}">
                 <button type="submit" name="action" value="fetch">Fetch New Articles</button>
                 <button type="submit" name="action" value="show" class="option-btn">Show Stored Only</button>
-                <select name="filter_source" onchange="this.form.submit()" style="margin-left:10px;">
+                <select name="filter_source" onchange="this.form.filter_topic.value='';this.form.submit()" style="margin-left:10px;">
                     <option value="">Filter by website...</option>
                     {% for src in sources %}
                         <option value="{{ src }}" {% if src == selected_source %}selected{% endif %}>{{ src }}</option>
                     {% endfor %}
                 </select>
+                <select name="filter_topic" onchange="this.form.filter_source.value='';this.form.submit()">
+                    <option value="">Filter by topic...</option>
+                    {% for t in topics %}
+                        <option value="{{ t['topic'] }}" {% if t['topic'] == selected_topic %}selected{% endif %}>{{ t['label'] }} ({{ t['count'] }})</option>
+                    {% endfor %}
+                </select>
             </form>
             <div id="loading" class="loading" style="display:{{ 'block' if loading else 'none' }};">
                 Please wait...
             </div>
-            {% if articles %}
-                <h2>Articles{% if domain %} from {{ domain }}{% endif %}</h2>
+            {% if article_count %}
+                <h2>Articles{% if domain %} from {{ domain }}{% elif topic_name %} about {{ topic_name }}{% endif %}</h2>
                 <ul id="dynamic-article-list">
-                {% for art in articles %}
-                    <li>
-                        <a href="#" class="article-link" data-url="{{ art['url'] }}">{{ art['title'] }}</a>
-                        <div class="source">{{ art['language']|upper }} | {{ art['sentiment']|capitalize }}</div>
-                    </li>
-                {% endfor %}
+                {{ article_items|safe }}
                 </ul>
+                {% if (topic_name and article_count >= topic_page_size) or (domain and not loading and article_count >= source_page_size) %}
+                <button id="list-more-btn" style="display: block; margin: 0 auto;">Show More</button>
+                <script>
+                let listPage = 1;
+                document.getElementById('list-more-btn').onclick = function() {
+                    {% if topic_name %}
+                    fetch('/topic_articles?topic={{ selected_topic }}&page=' + listPage)
+                    {% else %}
+                    fetch('/source_articles?source=' + encodeURIComponent("{{ domain }}") + '&page=' + listPage)
+                    {% endif %}
+                        .then(response => response.json())
+                        .then(data => {
+                            const list = document.getElementById('dynamic-article-list');
+                            data.articles.forEach(function(art) {
+                                let li = document.createElement('li');
+                                li.innerHTML = `<a href="#" class="article-link" data-url="${art.url}">${art.title}</a>
+                                    <div class="source">{% if topic_name %}${art.source} | {% endif %}${art.language.toUpperCase()} | ${art.sentiment.charAt(0).toUpperCase() + art.sentiment.slice(1)}</div>`;
+                                list.appendChild(li);
+                            });
+                            listPage += 1;
+                            if (!data.has_more) {
+                                document.getElementById('list-more-btn').style.display = 'none';
+                            }
+                            attachModalEvents();
+                        });
+                };
+                </script>
+                {% endif %}
                 <script>
                 {% if loading and domain %}
                     pollForArticles("{{ domain }}");
@@ -355,15 +394,12 @@ HTML_TEMPLATE = """
                 </script>
             {% elif domain %}
                 <p>No articles found for this site.</p>
+            {% elif topic_name %}
+                <p>No articles found for this topic.</p>
             {% else %}
                 <h2>All Articles</h2>
                 <ul id="article-list">
-                {% for art in all_articles %}
-                    <li>
-                        <a href="#" class="article-link" data-url="{{ art['url'] }}">{{ art['title'] }}</a>
-                        <div class="source">{{ art['source'] }} | {{ art['language']|upper }} | {{ art['sentiment']|capitalize }}</div>
-                    </li>
-                {% endfor %}
+                {{ article_items|safe }}
                 </ul>
                 <button id="show-more-btn" style="display: block; margin: 0 auto;">Show More</button>
                 <script>
@@ -407,60 +443,167 @@ HTML_TEMPLATE = """
 </html>
 """
 
+# Article <li> items, rendered once per source (first page) or topic page and cached
+ARTICLE_ITEMS_TEMPLATE = """
+{% for art in articles %}
+    <li>
+        <a href="#" class="article-link" data-url="{{ art['url'] }}">{{ art['title'] }}</a>
+        <div class="source">{% if show_source %}{{ art['source'] }} | {% endif %}{{ art['language']|upper }} | {{ art['sentiment']|capitalize }}</div>
+    </li>
+{% endfor %}
+"""
+
+# Compiled once at startup instead of per request
+index_template = app.jinja_env.from_string(HTML_TEMPLATE)
+article_items_template = app.jinja_env.from_string(ARTICLE_ITEMS_TEMPLATE)
+
+# ---------------------------
+# Fragment cache
+# ---------------------------
+# Keys are (kind, source filter, page or query). Fetches started from this process
+# invalidate their source directly; the TTL covers inserts from other processes.
+# The home page's random sample is not cached, so every visit gets a new one.
+FRAGMENT_TTL = int(os.environ.get("INSIGHTBOT_FRAGMENT_TTL", 60))
+fragments = FragmentCache(max_entries=512, ttl=FRAGMENT_TTL)
+
+TOPIC_PAGE_SIZE = 20
+SOURCE_PAGE_SIZE = 20
+
+def cached_sources():
+    return fragments.get_or_render(("sources", None, 0), store.list_sources)
+
+def cached_topics():
+    """Topic facet options from the precomputed per-topic summaries."""
+    def render():
+        return [
+            {"topic": t["topic"], "label": topic_label(t["topic"], n=4), "count": t["count"]}
+            for t in store.topic_summaries() if t["count"]
+        ]
+    return fragments.get_or_render(("topics", None, 0), render)
+
+def topic_list_fragment(topic, page=0):
+    """(html, count) for one page of a topic's articles, best matches first."""
+    def render():
+        arts = store.find_by_topic(topic, page=page, page_size=TOPIC_PAGE_SIZE)
+        html = article_items_template.render(articles=arts, show_source=True)
+        return html, len(arts)
+    return fragments.get_or_render(("topic_articles", topic, page), render)
+
+def article_list_fragment(source=None, size=10):
+    """(html, count) for the first page of a source's articles (newest first),
+    or a random sample of `size` when source is None. /source_articles serves
+    the later pages."""
+    def render():
+        if source:
+            arts = store.find_by_source(source, page_size=SOURCE_PAGE_SIZE)
+        else:
+            arts = store.sample_articles(size)
+        html = article_items_template.render(articles=arts, show_source=source is None)
+        return html, len(arts)
+    if source is None:
+        return render()
+    return fragments.get_or_render(("articles", source, 0), render)
+
+def invalidate_source(source):
+    """Drop the fragments that can show `source` (its list, dropdowns, topics)."""
+    fragments.invalidate(
+        lambda key: key[0] in ("sources", "topics", "topic_articles") or key[1] in (source, None)
+    )
+
+# ---------------------------
+# Request metrics
+# ---------------------------
+if metrics.ENABLED:
+    @app.before_request
+    def start_request_timer():
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def record_request_metrics(response):
+        start = g.pop("request_start", None)
+        if start is not None:
+            labels = {
+                "route": request.url_rule.rule if request.url_rule else "unmatched",
+                "method": request.method,
+                "status": response.status_code,
+            }
+
+            def record():
+                metrics.observe("http_request_duration_seconds", time.perf_counter() - start, **labels)
+
+            if response.is_streamed:
+                # Streamed bodies (/export) finish after this hook: time until the response closes
+                response.call_on_close(record)
+            else:
+                record()
+        return response
+
+@app.route("/metrics")
+def metrics_endpoint():
+    return Response(metrics.render_prometheus(), mimetype="text/plain; version=0.0.4")
+
 def async_process_website(site_url):
-    thread = threading.Thread(target=process_website, args=(site_url,))
+    # Imported on first fetch: keeps the scraping/NLP stack out of app startup
+    from fetch_process_upload import process_website
+
+    thread = threading.Thread(
+        target=process_website, args=(site_url,), kwargs={"on_insert": invalidate_source}
+    )
     thread.daemon = True
     thread.start()
 
 @app.route("/", methods=["GET", "POST"])
 def index():
-    articles = []
-    all_articles = []
+    article_items = ""
+    article_count = 0
     domain = None
     site_url = ""
     loading = False
     initial_count = 10
 
     # Get all unique sources for the filter dropdown
-    sources = sorted(collection.distinct("source"))
+    sources = cached_sources()
+
+    topics = cached_topics()
 
     selected_source = request.form.get("filter_source", "") if request.method == "POST" else ""
+    selected_topic = request.form.get("filter_topic", "") if request.method == "POST" else ""
+    selected_topic = int(selected_topic) if selected_topic.isdigit() else None
+    topic_name = None
 
     if request.method == "POST":
         site_url = request.form.get("site_url", "").strip()
         action = request.form.get("action")
         # If a filter is selected, show only articles from that source
         if selected_source:
-            articles = list(collection.find(
-                {"source": selected_source},
-                {"title": 1, "url": 1, "language": 1, "sentiment": 1, "_id": 0, "source": 1}
-            ))
+            article_items, article_count = article_list_fragment(selected_source)
             domain = selected_source
+        elif selected_topic is not None:
+            article_items, article_count = topic_list_fragment(selected_topic)
+            topic_name = topic_label(selected_topic)
         elif site_url:
             domain = urlparse(site_url).netloc.replace("www.", "")
-            articles = list(collection.find(
-                {"source": domain},
-                {"title": 1, "url": 1, "language": 1, "sentiment": 1, "_id": 0, "source": 1}
-            ))
-            if action == "fetch":
+            article_items, article_count = article_list_fragment(domain)
+            if action == "fetch" and not SNAPSHOT_MODE:
                 loading = True
                 async_process_website(site_url)
     else:
-        all_articles = list(collection.aggregate([
-            {"$sample": {"size": initial_count}},
-            {"$project": {"title": 1, "url": 1, "language": 1, "sentiment": 1, "source": 1, "_id": 0}}
-        ]))
-
-    return render_template_string(
-        HTML_TEMPLATE,
-        articles=articles,
-        all_articles=all_articles,
+        article_items, _ = article_list_fragment(None, size=initial_count)
+
+    return index_template.render(
+        article_items=article_items,
+        article_count=article_count,
         domain=domain,
         site_url=site_url,
         loading=loading,
         initial_count=initial_count,
         sources=sources,
-        selected_source=selected_source
+        selected_source=selected_source,
+        topics=topics,
+        selected_topic=selected_topic,
+        topic_name=topic_name,
+        topic_page_size=TOPIC_PAGE_SIZE,
+        source_page_size=SOURCE_PAGE_SIZE
     )
 
 # Endpoint to serve more articles for 'Show More' button
@@ -468,58 +611,173 @@ def index():
 def more_articles():
     offset = int(request.args.get("offset", 0))
     batch_size = 10
-    total_count = collection.count_documents({})
+    total_count = store.count_articles()
     has_more = offset + batch_size < total_count
-    articles = list(collection.aggregate([
-        {"$sample": {"size": batch_size}},
-        {"$project": {"title": 1, "url": 1, "language": 1, "sentiment": 1, "source": 1, "_id": 0}}
-    ]))
+    articles = store.sample_articles(batch_size)
     return jsonify({
         "articles": articles,
         "count": len(articles),
         "has_more": has_more
     })
 
-# Endpoint to serve latest articles for a domain (for polling)
+def date_range_args():
+    """(from, to) datetimes from the request's `from`/`to` arguments.
+
+    Both are optional and take ISO dates/datetimes or relative ages
+    ("24h", "7d"); raises ValueError when malformed.
+    """
+    return parse_range(request.args.get("from") or None, request.args.get("to") or None)
+
+# Endpoint to serve latest articles for a domain (for polling), newest first.
+# With `from`/`to` it lists a time window, for one domain or across all sources.
 @app.route("/latest_articles")
 def latest_articles():
     domain = request.args.get("domain")
-    if not domain:
+    try:
+        date_from, date_to = date_range_args()
+        limit = min(int(request.args.get("limit", 30)), 100)
+    except ValueError:
+        return jsonify({"error": "invalid from/to/limit"}), 400
+    if not domain and not (date_from or date_to):
         return jsonify({"articles": []})
-    articles = list(collection.find(
-        {"source": domain},
-        {"title": 1, "url": 1, "language": 1, "sentiment": 1, "_id": 0, "source": 1}
-    ).sort("_id", -1).limit(30))
+    articles = store.find_recent(domain, date_from=date_from, date_to=date_to, limit=limit)
     return jsonify({"articles": articles})
 
 @app.route("/article_details")
 def article_details():
     url = request.args.get("url")
-    article = collection.find_one({"url": url})
+    article = store.find_article(url)
     if not article:
         return jsonify({"error": "Not found"}), 404
+    return jsonify(article_to_json(article))
 
-    # Convert date if it's a timestamp in milliseconds
-    date_val = article.get("date", "")
-    date_str = ""
-    if isinstance(date_val, (int, float)):
-        try:
-            # Convert milliseconds to seconds
-            date_str = datetime.utcfromtimestamp(date_val / 1000).strftime("%Y-%m-%d %H:%M")
-        except Exception:
-            date_str = str(date_val)
-    elif isinstance(date_val, str):
-        date_str = date_val
-
-    return jsonify({
+def article_to_json(article):
+    """Detail view of an article as served by /article_details."""
+    return {
         "title": article.get("title", ""),
         "body": article.get("body", ""),
         "source": article.get("source", ""),
         "language": article.get("language", ""),
         "sentiment": article.get("sentiment", ""),
-        "date": date_str,
+        "date": format_date(article.get("date")),
         "url": article.get("url", "")
+    }
+
+# Endpoint to serve top terms (word cloud data) for any language/source/day slice
+@app.route("/top_terms")
+def top_terms_endpoint():
+    try:
+        n = min(int(request.args.get("n", 50)), 500)
+    except ValueError:
+        n = 50
+    try:
+        date_from, date_to = date_range_args()
+    except ValueError:
+        return jsonify({"error": "invalid from/to"}), 400
+    # term_counts is bucketed by UTC day, so bounds are widened to whole days
+    language = request.args.get("language") or None
+    source = request.args.get("source") or None
+    day_from, day_to = to_day(date_from), to_day(date_to)
+    # Cached per filter; keyed on source so inserts invalidate it like the lists
+    terms = fragments.get_or_render(
+        ("top_terms", source, (language, n, day_from, day_to)),
+        lambda: store.top_terms(n=n, language=language, source=source,
+                                day_from=day_from, day_to=day_to),
+    )
+    return jsonify({"terms": terms, "count": len(terms)})
+
+# Endpoint listing topics with keywords, counts and top articles
+@app.route("/topics")
+def topics_endpoint():
+    summaries = store.topic_summaries()
+    for t in summaries:
+        t["label"] = topic_label(t["topic"], n=4)
+    return jsonify({"topics": summaries})
+
+# Endpoint to page through one topic's articles (most representative first)
+@app.route("/topic_articles")
+def topic_articles():
+    try:
+        topic = int(request.args.get("topic", ""))
+        page = max(int(request.args.get("page", 0)), 0)
+    except ValueError:
+        return jsonify({"error": "topic and page must be integers"}), 400
+    articles = store.find_by_topic(topic, page=page, page_size=TOPIC_PAGE_SIZE)
+    return jsonify({
+        "articles": articles,
+        "count": len(articles),
+        "has_more": len(articles) == TOPIC_PAGE_SIZE
     })
 
+# Endpoint to page through one source's articles (newest first)
+@app.route("/source_articles")
+def source_articles():
+    source = request.args.get("source", "")
+    try:
+        page = max(int(request.args.get("page", 0)), 0)
+    except ValueError:
+        return jsonify({"error": "page must be an integer"}), 400
+    if not source:
+        return jsonify({"error": "source is required"}), 400
+    articles = store.find_by_source(source, page=page, page_size=SOURCE_PAGE_SIZE)
+    return jsonify({
+        "articles": articles,
+        "count": len(articles),
+        "has_more": len(articles) == SOURCE_PAGE_SIZE
+    })
+
+# Endpoint for full-text search over titles and bodies
+@app.route("/search")
+def search():
+    query = request.args.get("q", "").strip()
+    if not query:
+        return jsonify({"articles": [], "count": 0})
+    try:
+        limit = min(int(request.args.get("limit", 30)), 100)
+    except ValueError:
+        limit = 30
+    try:
+        date_from, date_to = date_range_args()
+    except ValueError:
+        return jsonify({"error": "invalid from/to"}), 400
+    articles = store.search_articles(query, source=request.args.get("source") or None, limit=limit,
+                                     date_from=date_from, date_to=date_to)
+    return jsonify({"articles": articles, "count": len(articles)})
+
+# Endpoint streaming a filtered article set as NDJSON, CSV or Parquet.
+# Rows come straight from a server-side cursor in chunks, so memory use does
+# not grow with the size of the export.
+@app.route("/export")
+def export_articles():
+    fmt = request.args.get("format", "ndjson").lower()
+    if fmt not in export.FORMATS:
+        return jsonify({"error": f"format must be one of {', '.join(export.FORMATS)}"}), 400
+    if fmt == "parquet" and not export.parquet_available():
+        return jsonify({"error": "parquet export needs pyarrow installed on the server"}), 501
+    try:
+        fields = export.parse_fields(request.args.get("fields"))
+        date_from, date_to = date_range_args()
+        limit = int(request.args.get("limit", 0))
+        if limit < 0:
+            raise ValueError("limit must not be negative")
+    except ValueError as e:
+        return jsonify({"error": str(e) or "invalid from/to/limit"}), 400
+
+    rows = store.iter_articles(
+        fields,
+        source=request.args.get("source") or None,
+        language=request.args.get("language") or None,
+        sentiment=request.args.get("sentiment") or None,
+        date_from=date_from,
+        date_to=date_to,
+        limit=limit,
+    )
+    mimetype, extension = export.FORMATS[fmt]
+    return Response(
+        stream_with_context(export.WRITERS[fmt](rows, fields)),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename=articles.{extension}"},
+    )
+
 if __name__ == "__main__":
     app.run(debug=True)
\ No newline at end of file
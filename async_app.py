@@ -0,0 +1,113 @@
+"""
+async_app.py
+Async serving mode: the read endpoints on Quart + pymongo's AsyncMongoClient.
+
+`/more_articles`, `/latest_articles` and `/article_details` are served by
+async handlers, so one worker can hold many in-flight reads without a thread
+each. Every other route (index page, fetching, /top_terms, /metrics) is
+forwarded to the regular Flask app from app.py.
+
+Production:
+
+    hypercorn --config hypercorn.toml async_app:application
+"""
+
+import time
+
+from asgiref.wsgi import WsgiToAsgi
+from quart import Quart, request, jsonify, g
+
+import metrics
+from app import app as flask_app, article_to_json, SNAPSHOT_MODE
+from data_access import (
+    get_async_client, count_articles_async, find_article_async, find_recent_async,
+    sample_articles_async,
+)
+from dates import parse_range
+
+# Paths handled by the async app; everything else goes to Flask. A snapshot
+# (SQLite) store has no async driver, so Flask serves everything in that mode.
+ASYNC_PATHS = set() if SNAPSHOT_MODE else {"/more_articles", "/latest_articles", "/article_details"}
+
+app = Quart(__name__)
+
+@app.before_serving
+async def connect():
+    get_async_client()
+
+@app.after_serving
+async def disconnect():
+    await get_async_client().close()
+
+# ---------------------------
+# Request metrics
+# ---------------------------
+if metrics.ENABLED:
+    @app.before_request
+    async def start_request_timer():
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    async def record_request_metrics(response):
+        start = g.pop("request_start", None)
+        if start is not None:
+            route = request.url_rule.rule if request.url_rule else "unmatched"
+            metrics.observe(
+                "http_request_duration_seconds",
+                time.perf_counter() - start,
+                route=route, method=request.method, status=response.status_code,
+            )
+        return response
+
+# ---------------------------
+# Read endpoints
+# ---------------------------
+@app.route("/more_articles")
+async def more_articles():
+    offset = int(request.args.get("offset", 0))
+    batch_size = 10
+    total_count = await count_articles_async()
+    has_more = offset + batch_size < total_count
+    articles = await sample_articles_async(batch_size)
+    return jsonify({
+        "articles": articles,
+        "count": len(articles),
+        "has_more": has_more
+    })
+
+@app.route("/latest_articles")
+async def latest_articles():
+    domain = request.args.get("domain")
+    try:
+        date_from, date_to = parse_range(request.args.get("from") or None,
+                                         request.args.get("to") or None)
+        limit = min(int(request.args.get("limit", 30)), 100)
+    except ValueError:
+        return jsonify({"error": "invalid from/to/limit"}), 400
+    if not domain and not (date_from or date_to):
+        return jsonify({"articles": []})
+    articles = await find_recent_async(domain, date_from=date_from, date_to=date_to, limit=limit)
+    return jsonify({"articles": articles})
+
+@app.route("/article_details")
+async def article_details():
+    url = request.args.get("url")
+    article = await find_article_async(url)
+    if not article:
+        return jsonify({"error": "Not found"}), 404
+    return jsonify(article_to_json(article))
+
+# ---------------------------
+# ASGI entry point
+# ---------------------------
+flask_asgi = WsgiToAsgi(flask_app)
+
+async def application(scope, receive, send):
+    """Route read endpoints (and lifespan events) to Quart, the rest to Flask."""
+    if scope["type"] == "lifespan" or scope.get("path") in ASYNC_PATHS:
+        await app(scope, receive, send)
+    else:
+        await flask_asgi(scope, receive, send)
+
+if __name__ == "__main__":
+    app.run(debug=True)
@@ -0,0 +1,107 @@
+"""
+compare_sentiment_backends.py
+Accuracy agreement and latency/memory of the sentiment inference backends.
+
+Labels are compared with the fp32 labels stored in
+data/preprocessed/articles_preprocessed.json (produced by preprocess_articles.py
+with the stock pipeline), so the fp32 row doubles as a sanity check.
+
+    python benchmarks/compare_sentiment_backends.py --backends fp32,int8,onnx
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+import psutil
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from sentiment_model import BACKENDS, load_sentiment_model, stars_to_sentiment  # noqa: E402
+
+DATASET_PATH = ROOT / "data" / "preprocessed" / "articles_preprocessed.json"
+
+def rss_mib():
+    return psutil.Process(os.getpid()).memory_info().rss / 2**20
+
+def run_backend(backend, texts, batch_size):
+    rss_before = rss_mib()
+    start = time.perf_counter()
+    model = load_sentiment_model(backend)
+    load_seconds = time.perf_counter() - start
+    rss_loaded = rss_mib()
+
+    model(texts[:2], truncation=True)  # warm-up
+    start = time.perf_counter()
+    results = model(texts, truncation=True, batch_size=batch_size)
+    infer_seconds = time.perf_counter() - start
+
+    return {
+        "labels": [stars_to_sentiment(r) for r in results],
+        "load_seconds": load_seconds,
+        "ms_per_article": infer_seconds / len(texts) * 1000,
+        "model_rss_mib": rss_loaded - rss_before,
+        "peak_rss_mib": rss_mib(),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare sentiment inference backends")
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--dataset", type=Path, default=DATASET_PATH)
+    parser.add_argument("--limit", type=int, default=0, help="only use the first N articles")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--output", type=Path, help="write results as JSON")
+    args = parser.parse_args()
+
+    with open(args.dataset, "r", encoding="utf-8") as f:
+        articles = json.load(f)
+    if args.limit:
+        articles = articles[:args.limit]
+    texts = [str(a.get("body", "")) for a in articles]
+    reference = [a.get("sentiment") for a in articles]
+    print(f"Loaded {len(texts)} articles from {args.dataset}")
+
+    # Each backend is measured in a fresh process so RSS numbers are not shared.
+    backends = [b for b in args.backends.split(",") if b]
+    if len(backends) > 1:
+        import subprocess
+        summary = {}
+        for backend in backends:
+            out = subprocess.run(
+                [sys.executable, __file__, "--backends", backend, "--dataset", str(args.dataset),
+                 "--limit", str(args.limit), "--batch-size", str(args.batch_size),
+                 "--output", "-"],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            summary[backend] = json.loads(out.strip().splitlines()[-1])
+    else:
+        res = run_backend(backends[0], texts, args.batch_size)
+        labels = res.pop("labels")
+        res["agreement"] = sum(a == b for a, b in zip(labels, reference)) / len(reference)
+        res["drift"] = dict(Counter(
+            f"{b}->{a}" for a, b in zip(labels, reference) if a != b
+        ))
+        if args.output and str(args.output) == "-":
+            print(json.dumps(res))
+            return
+        summary = {backends[0]: res}
+
+    base = summary.get("fp32")
+    print(f"\n{'backend':<8}{'agree':>8}{'ms/art':>10}{'speedup':>9}{'load s':>8}{'model MiB':>11}")
+    for backend, res in summary.items():
+        speedup = base["ms_per_article"] / res["ms_per_article"] if base else float("nan")
+        print(f"{backend:<8}{res['agreement']:>8.1%}{res['ms_per_article']:>10.1f}"
+              f"{speedup:>8.2f}x{res['load_seconds']:>8.1f}{res['model_rss_mib']:>11.0f}")
+        if res["drift"]:
+            print(f"         drift: {res['drift']}")
+
+    if args.output:
+        args.output.write_text(json.dumps(summary, indent=2), encoding="utf-8")
+
+if __name__ == "__main__":
+    main()
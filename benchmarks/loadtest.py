@@ -0,0 +1,321 @@
+"""
+loadtest.py
+Load-test harness for the web app on a single Linux box.
+
+1. Seeds a local mongod (separate `insightbot_loadtest` database) with the
+   bundled preprocessed dataset scaled up synthetically to --articles
+   documents: originals are cycled with unique URLs and dates spread over the
+   last --days days. Seeding is skipped when the database already holds a
+   seed of the same size (use --reseed to force).
+2. Starts the app against that database (Flask threaded dev server, or
+   hypercorn with async_app), unless --url points at a running server.
+3. Replays a mix of index views, source filters, show-more clicks, modal
+   opens and fetch-polling from closed-loop virtual users spread over several
+   client processes, then reports throughput and p50/p95/p99 latency per
+   route.
+
+    python benchmarks/loadtest.py --articles 100000 --duration 60
+    python benchmarks/loadtest.py --server hypercorn --server-workers 4 --users 64
+    python benchmarks/loadtest.py --url http://127.0.0.1:5000 --max-p99-ms 250
+
+With --max-p99-ms / --min-rps the run exits 1 when a route misses the target,
+so it can gate a release.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from urllib.parse import quote
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# ---------------------------
+# Config
+# ---------------------------
+PREPROCESSED_FILE = ROOT / "data" / "preprocessed" / "articles_preprocessed.json"
+LOADTEST_DB_NAME = "insightbot_loadtest"
+SEED_BATCH = 5000
+STARTUP_TIMEOUT = 60    # seconds to wait for the server to answer
+
+# Relative weights of the request mix (a browsing session: page views,
+# "Show More" clicks, article modals and the polling that follows a fetch)
+ROUTE_MIX = {
+    "index": 15,
+    "index_filtered": 10,
+    "more_articles": 25,
+    "article_details": 30,
+    "latest_articles": 20,
+}
+
+# ---------------------------
+# Seeding
+# ---------------------------
+def synthetic_articles(originals, count, days, seed=0):
+    """`count` articles cycled from `originals` with unique URLs and spread dates."""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    span = days * 86400
+    for i in range(count):
+        base = originals[i % len(originals)]
+        copy = i // len(originals)
+        art = {k: v for k, v in base.items() if k != "_id"}
+        if copy:
+            art["url"] = f"{base['url']}#lt{copy}"
+            art["title"] = f"{base.get('title', '')} ({copy})"
+        art["date"] = now - timedelta(seconds=rng.randrange(span))
+        yield art
+
+def seed_database(mongo_uri, db_name, count, days, reseed=False):
+    import data_access
+    from pymongo import MongoClient
+
+    db = MongoClient(mongo_uri, serverSelectionTimeoutMS=2000)[db_name]
+    meta = db["loadtest_meta"].find_one({"_id": "seed"})
+    if meta and meta.get("articles") == count and not reseed:
+        print(f"ℹ️ {db_name} already seeded with {count} articles")
+        return db
+
+    with open(PREPROCESSED_FILE, "r", encoding="utf-8") as f:
+        originals = json.load(f)
+
+    print(f"🌱 Seeding {db_name} with {count} articles ...")
+    start = time.perf_counter()
+    data_access.use_database(db)
+    collection = data_access.get_collection()
+    collection.drop()
+    batch = []
+    for art in synthetic_articles(originals, count, days):
+        batch.append(art)
+        if len(batch) >= SEED_BATCH:
+            collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        collection.insert_many(batch, ordered=False)
+    data_access.ensure_indexes(force=True)
+    db["loadtest_meta"].replace_one({"_id": "seed"}, {"_id": "seed", "articles": count}, upsert=True)
+    print(f"✅ Seeded in {time.perf_counter() - start:.1f}s")
+    return db
+
+def request_pools(db, size=2000):
+    """Sources and article URLs the virtual users pick from."""
+    sources = sorted(db["articles"].distinct("source"))
+    urls = [d["url"] for d in db["articles"].aggregate([
+        {"$sample": {"size": size}}, {"$project": {"url": 1, "_id": 0}}
+    ])]
+    return sources, urls
+
+# ---------------------------
+# Server
+# ---------------------------
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_server(kind, workers, mongo_uri, db_name):
+    port = free_port()
+    env = dict(os.environ, MONGO_URI=mongo_uri, INSIGHTBOT_DB=db_name)
+    env.pop("INSIGHTBOT_SNAPSHOT", None)
+    if kind == "hypercorn":
+        cmd = ["hypercorn", "async_app:application", "--bind", f"127.0.0.1:{port}",
+               "--workers", str(workers)]
+    else:
+        cmd = [sys.executable, "-m", "flask", "--app", "app", "run",
+               "--port", str(port), "--with-threads"]
+    print(f"🚀 Starting {kind} server on port {port}")
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return proc, f"http://127.0.0.1:{port}"
+
+def wait_for_server(base_url, proc=None):
+    import requests
+
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if proc is not None and proc.poll() is not None:
+            sys.exit(f"❌ Server exited with code {proc.returncode}")
+        try:
+            if requests.get(f"{base_url}/more_articles", timeout=2).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    sys.exit(f"❌ Server at {base_url} did not come up within {STARTUP_TIMEOUT}s")
+
+# ---------------------------
+# Virtual users
+# ---------------------------
+def make_request(session, route, base_url, sources, urls, rng):
+    if route == "index":
+        return session.get(f"{base_url}/")
+    if route == "index_filtered":
+        return session.post(f"{base_url}/", data={"filter_source": rng.choice(sources)})
+    if route == "more_articles":
+        return session.get(f"{base_url}/more_articles?offset={rng.randrange(10, 200, 10)}")
+    if route == "article_details":
+        return session.get(f"{base_url}/article_details?url={quote(rng.choice(urls), safe='')}")
+    return session.get(f"{base_url}/latest_articles?domain={quote(rng.choice(sources))}")
+
+def run_users(args):
+    """One client process: `users` threads hammering the server until `stop_at`."""
+    base_url, users, stop_at, think_ms, sources, urls, seed = args
+    import requests
+
+    routes, weights = zip(*ROUTE_MIX.items())
+    latencies = {r: [] for r in routes}
+    errors = {r: 0 for r in routes}
+    lock = threading.Lock()
+
+    def user(n):
+        rng = random.Random(seed * 1000 + n)
+        session = requests.Session()
+        while time.time() < stop_at:
+            route = rng.choices(routes, weights)[0]
+            start = time.perf_counter()
+            try:
+                ok = make_request(session, route, base_url, sources, urls, rng).status_code == 200
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                if ok:
+                    latencies[route].append(elapsed)
+                else:
+                    errors[route] += 1
+            if think_ms:
+                time.sleep(rng.expovariate(1000 / think_ms))
+
+    threads = [threading.Thread(target=user, args=(n,)) for n in range(users)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, errors
+
+# ---------------------------
+# Reporting
+# ---------------------------
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+def summarize(latencies, errors, duration):
+    results = {}
+    for route in list(ROUTE_MIX) + ["all"]:
+        if route == "all":
+            values = sorted(v for vs in latencies.values() for v in vs)
+            errs = sum(errors.values())
+        else:
+            values = sorted(latencies[route])
+            errs = errors[route]
+        results[route] = {
+            "requests": len(values),
+            "errors": errs,
+            "rps": len(values) / duration,
+            "p50_ms": percentile(values, 50) * 1000,
+            "p95_ms": percentile(values, 95) * 1000,
+            "p99_ms": percentile(values, 99) * 1000,
+        }
+    return results
+
+def report(results):
+    print(f"\n{'route':<20}{'requests':>10}{'errors':>8}{'req/s':>10}"
+          f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for route, r in results.items():
+        print(f"{route:<20}{r['requests']:>10}{r['errors']:>8}{r['rps']:>10.1f}"
+              f"{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}")
+
+def check_targets(results, max_p99_ms=None, min_rps=None):
+    failures = []
+    for route, r in results.items():
+        if r["errors"]:
+            failures.append(f"{route}: {r['errors']} errors")
+        if max_p99_ms and route != "all" and r["p99_ms"] > max_p99_ms:
+            failures.append(f"{route}: p99 {r['p99_ms']:.1f} ms > {max_p99_ms} ms")
+    if min_rps and results["all"]["rps"] < min_rps:
+        failures.append(f"throughput {results['all']['rps']:.1f} req/s < {min_rps}")
+    return failures
+
+# ---------------------------
+# Run
+# ---------------------------
+def main():
+    parser = argparse.ArgumentParser(description="InsightBot load test")
+    parser.add_argument("--mongo-uri", default=os.environ.get("LOADTEST_MONGO_URI", "mongodb://localhost:27017"))
+    parser.add_argument("--db", default=LOADTEST_DB_NAME)
+    parser.add_argument("--articles", type=int, default=10000, help="seeded collection size")
+    parser.add_argument("--days", type=int, default=30, help="spread seeded dates over this many days")
+    parser.add_argument("--reseed", action="store_true")
+    parser.add_argument("--url", help="test a running server instead of starting one")
+    parser.add_argument("--server", choices=("flask", "hypercorn"), default="flask")
+    parser.add_argument("--server-workers", type=int, default=1, help="hypercorn worker processes")
+    parser.add_argument("--users", type=int, default=32, help="concurrent virtual users")
+    parser.add_argument("--processes", type=int, default=max(1, min(4, (os.cpu_count() or 2) // 2)),
+                        help="client processes the users are spread over")
+    parser.add_argument("--duration", type=float, default=30, help="seconds of measured load")
+    parser.add_argument("--warmup", type=float, default=5, help="seconds of unmeasured load first")
+    parser.add_argument("--think-ms", type=float, default=0, help="mean pause between a user's requests")
+    parser.add_argument("--max-p99-ms", type=float, help="fail if any route's p99 exceeds this")
+    parser.add_argument("--min-rps", type=float, help="fail if total throughput is below this")
+    parser.add_argument("--output", type=Path, help="write results as JSON")
+    args = parser.parse_args()
+
+    db = seed_database(args.mongo_uri, args.db, args.articles, args.days, args.reseed)
+    sources, urls = request_pools(db)
+
+    proc = None
+    base_url = args.url
+    if not base_url:
+        proc, base_url = start_server(args.server, args.server_workers, args.mongo_uri, args.db)
+    try:
+        wait_for_server(base_url, proc)
+        processes = min(args.processes, args.users)
+        per_process = [args.users // processes + (i < args.users % processes) for i in range(processes)]
+
+        with multiprocessing.Pool(processes) as pool:
+            if args.warmup:
+                print(f"🔥 Warming up for {args.warmup:.0f}s")
+                stop_at = time.time() + args.warmup
+                pool.map(run_users, [(base_url, n, stop_at, args.think_ms, sources, urls, i)
+                                     for i, n in enumerate(per_process)])
+
+            print(f"⏱️  {args.users} users over {processes} processes for {args.duration:.0f}s")
+            start = time.time()
+            stop_at = start + args.duration
+            parts = pool.map(run_users, [(base_url, n, stop_at, args.think_ms, sources, urls, i + 100)
+                                         for i, n in enumerate(per_process)])
+            elapsed = time.time() - start
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    latencies = {r: [v for lat, _ in parts for v in lat[r]] for r in ROUTE_MIX}
+    errors = {r: sum(err[r] for _, err in parts) for r in ROUTE_MIX}
+    results = summarize(latencies, errors, elapsed)
+    report(results)
+    if args.output:
+        args.output.write_text(json.dumps({
+            "articles": args.articles, "users": args.users, "server": args.url or args.server,
+            "duration": elapsed, "routes": results,
+        }, indent=2), encoding="utf-8")
+
+    failures = check_targets(results, args.max_p99_ms, args.min_rps)
+    if failures:
+        print("\n❌ Load test targets missed:\n- " + "\n- ".join(failures))
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
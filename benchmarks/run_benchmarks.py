@@ -0,0 +1,301 @@
+"""
+run_benchmarks.py
+Micro-benchmarks for the pipeline and web hot paths.
+
+Uses the bundled data/extracted and data/preprocessed files and a stub
+sentiment model (unless --real-model). The Flask routes run against a
+read-only snapshot (snapshot.py) built from the bundled dataset, or against a
+local mongod with --mongo-uri. Reports ops/sec and peak memory per benchmark
+and compares them against a stored baseline.
+
+    python benchmarks/run_benchmarks.py --save-baseline      # record baseline
+    python benchmarks/run_benchmarks.py                      # compare to it
+    python benchmarks/run_benchmarks.py --only clean_text,route_
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+import types
+import zlib
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# ---------------------------
+# Config
+# ---------------------------
+EXTRACTED_FILE = ROOT / "data" / "extracted" / "articles_20250914.json"
+PREPROCESSED_FILE = ROOT / "data" / "preprocessed" / "articles_preprocessed.json"
+BASELINE_FILE = Path(__file__).resolve().parent / "baseline.json"
+BENCH_DB_NAME = "insightbot_bench"
+MIN_TIME = 0.5          # seconds spent per benchmark
+REGRESSION_THRESHOLD = 0.20  # flag ops/sec drops larger than 20%
+
+# ---------------------------
+# Stubs
+# ---------------------------
+STUB_LABELS = ["1 star", "2 stars", "3 stars", "4 stars", "5 stars"]
+
+def stub_pipeline(*args, **kwargs):
+    """Tiny deterministic stand-in for the transformers sentiment pipeline."""
+    def predict(texts, **_):
+        batch = [texts] if isinstance(texts, str) else list(texts)
+        return [
+            {"label": STUB_LABELS[zlib.crc32(t.encode("utf-8")) % 5], "score": 1.0}
+            for t in batch
+        ]
+    return predict
+
+def install_stub_model():
+    stub = types.ModuleType("transformers")
+    stub.pipeline = stub_pipeline
+    sys.modules["transformers"] = stub
+
+def install_stub_extractors():
+    """`extractors.site_extractors` is not shipped with the repo."""
+    try:
+        import extractors.site_extractors  # noqa: F401
+    except ImportError:
+        pkg = types.ModuleType("extractors")
+        mod = types.ModuleType("extractors.site_extractors")
+        mod.extract_article_from_site = lambda html, url, source: {
+            "url": url, "source": source, "title": "", "body": ""
+        }
+        pkg.site_extractors = mod
+        sys.modules["extractors"] = pkg
+        sys.modules["extractors.site_extractors"] = mod
+
+def bench_database(mongo_uri):
+    from pymongo import MongoClient
+    return MongoClient(mongo_uri, serverSelectionTimeoutMS=2000)[BENCH_DB_NAME]
+
+def bench_snapshot(preprocessed):
+    """Build a throwaway snapshot of the dataset and point the app at it."""
+    import tempfile
+    import snapshot
+
+    path = Path(tempfile.mkdtemp()) / "bench.sqlite"
+    snapshot.build_snapshot(preprocessed, path)
+    os.environ["INSIGHTBOT_SNAPSHOT"] = str(path)
+    snapshot.SNAPSHOT_PATH = path
+
+# ---------------------------
+# Measurement
+# ---------------------------
+def measure(fn, min_time=MIN_TIME):
+    fn()  # warm-up
+    runs = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < min_time:
+        fn()
+        runs += 1
+        elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "ops_per_sec": runs / elapsed,
+        "mean_us": elapsed / runs * 1e6,
+        "peak_kib": peak / 1024,
+    }
+
+# ---------------------------
+# Benchmarks
+# ---------------------------
+def load_dataset():
+    with open(PREPROCESSED_FILE, "r", encoding="utf-8") as f:
+        preprocessed = json.load(f)
+    with open(EXTRACTED_FILE, "r", encoding="utf-8") as f:
+        extracted = json.load(f)
+    return extracted, preprocessed
+
+def article_html(rec):
+    tags = ", ".join(rec.get("tags") or [])
+    paragraphs = "".join(f"<p>{p}</p>" for p in rec["body"].split(". "))
+    return (
+        "<html><head>"
+        f"<meta name=\"author\" content=\"{rec.get('author', '')}\">"
+        f"<meta property=\"article:section\" content=\"{rec.get('category', '')}\">"
+        f"<meta name=\"keywords\" content=\"{tags}\">"
+        f"</head><body><h1>{rec['title']}</h1>"
+        f"<div class=\"byline\">{rec.get('author', '')}</div>{paragraphs}</body></html>"
+    )
+
+def pipeline_benchmarks(extracted, preprocessed):
+    install_stub_extractors()
+    from bs4 import BeautifulSoup
+    from insightbot_dataset_builder import enrich_article
+    import fetch_process_upload as fpu
+    import term_stats
+
+    records = [a for a in extracted if isinstance(a.get("body"), str) and a["body"]]
+    bodies = [a["body"] for a in records]
+    sample = bodies[:20]
+    soups = [
+        (dict(rec), BeautifulSoup(article_html(rec), "html.parser"))
+        for rec in records[:20]
+    ]
+
+    return {
+        "clean_text": lambda: [fpu.clean_text(b) for b in sample],
+        "detect_language": lambda: [fpu.detect_language(b) for b in sample[:5]],
+        "sentiment_en_textblob": lambda: [fpu.analyze_sentiment(b, "en") for b in sample[:5]],
+        "sentiment_model_mapping": lambda: [fpu.analyze_sentiment(b, "ru") for b in sample],
+        "enrich_article": lambda: [enrich_article(dict(r), s) for r, s in soups],
+        "parse_html": lambda: [BeautifulSoup(article_html(r), "html.parser") for r in records[:5]],
+        "term_tokenize": lambda: term_stats.term_frequencies(bodies),
+    }
+
+def route_benchmarks(preprocessed, db=None):
+    """Flask routes against `db`, or against the snapshot when db is None."""
+    import data_access
+    import term_stats
+
+    if db is not None:
+        data_access.use_database(db)  # before importing app, which ensures indexes
+    import app as web
+
+    if db is not None:
+        collection = data_access.get_collection()
+        collection.drop()
+        collection.insert_many([dict(a) for a in preprocessed])
+        data_access.ensure_indexes()
+        term_stats.rebuild_term_counts(db, preprocessed)
+
+    client = web.app.test_client()
+    url = preprocessed[0]["url"]
+    source = preprocessed[0]["source"]
+
+    # Routes are timed with an empty fragment cache so they measure the queries
+    # and rendering; the *_cached variants time cache hits separately.
+    def get(path, cached=False):
+        def run():
+            if not cached:
+                web.fragments.invalidate(lambda key: True)
+            resp = client.get(path)
+            assert resp.status_code == 200, (path, resp.status_code)
+        return run
+
+    def post(path, data, cached=False):
+        def run():
+            if not cached:
+                web.fragments.invalidate(lambda key: True)
+            resp = client.post(path, data=data)
+            assert resp.status_code == 200, (path, resp.status_code)
+        return run
+
+    benches = {
+        "route_index": get("/"),
+        "route_index_filtered": post("/", {"filter_source": source}),
+        "route_index_filtered_cached": post("/", {"filter_source": source}, cached=True),
+        "route_more_articles": get("/more_articles?offset=10"),
+        "route_latest_articles": get(f"/latest_articles?domain={source}"),
+        "route_article_details": get(f"/article_details?url={url}"),
+        "route_top_terms": get("/top_terms?language=en&n=50"),
+        "route_top_terms_cached": get("/top_terms?language=en&n=50", cached=True),
+    }
+    if supports_text_search(db):
+        benches["route_search"] = get("/search?q=election")
+    else:
+        print("ℹ️ Backend has no text index, skipping route_search")
+    return benches
+
+def supports_text_search(db):
+    """Snapshots always have FTS5; a mongod needs the text index from ensure_indexes()."""
+    if db is None:
+        return True
+    import data_access
+    indexes = db[data_access.COLLECTION_NAME].index_information()
+    return any(any(kind == "text" for _, kind in info["key"]) for info in indexes.values())
+
+# ---------------------------
+# Baselines
+# ---------------------------
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, res in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        change = res["ops_per_sec"] / base["ops_per_sec"] - 1
+        res["change"] = change
+        if change < -threshold:
+            regressions.append(name)
+    return regressions
+
+def report(results):
+    print(f"\n{'benchmark':<28}{'ops/sec':>12}{'mean µs':>12}{'peak KiB':>12}{'vs base':>10}")
+    for name, res in results.items():
+        change = f"{res['change']:+.1%}" if "change" in res else "-"
+        print(f"{name:<28}{res['ops_per_sec']:>12.1f}{res['mean_us']:>12.1f}"
+              f"{res['peak_kib']:>12.1f}{change:>10}")
+
+# ---------------------------
+# Run
+# ---------------------------
+def main():
+    parser = argparse.ArgumentParser(description="InsightBot benchmarks")
+    parser.add_argument("--only", default="", help="comma-separated name fragments to run")
+    parser.add_argument("--mongo-uri", default=os.environ.get("BENCH_MONGO_URI"),
+                        help="run route benchmarks against this local mongod "
+                             "(default: a snapshot built from the bundled dataset)")
+    parser.add_argument("--real-model", action="store_true",
+                        help="use the real sentiment model instead of the stub")
+    parser.add_argument("--min-time", type=float, default=MIN_TIME)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    parser.add_argument("--output", type=Path, help="write results as JSON")
+    args = parser.parse_args()
+
+    if not args.real_model:
+        install_stub_model()
+
+    extracted, preprocessed = load_dataset()
+    benches = pipeline_benchmarks(extracted, preprocessed)
+    if args.mongo_uri:
+        benches.update(route_benchmarks(preprocessed, bench_database(args.mongo_uri)))
+    else:
+        bench_snapshot(preprocessed)
+        benches.update(route_benchmarks(preprocessed))
+
+    prefixes = [p for p in args.only.split(",") if p]
+    if prefixes:
+        benches = {k: v for k, v in benches.items() if any(p in k for p in prefixes)}
+
+    results = {}
+    for name, fn in benches.items():
+        print(f"⏱️  {name} ...")
+        results[name] = measure(fn, args.min_time)
+
+    regressions = []
+    if args.save_baseline:
+        baseline = {}
+        if args.baseline.exists():
+            baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        baseline.update(results)
+        args.baseline.write_text(json.dumps(baseline, indent=2), encoding="utf-8")
+        print(f"\n✅ Baseline saved to {args.baseline}")
+    elif args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        regressions = compare(results, baseline, args.threshold)
+
+    report(results)
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+    if regressions:
+        print(f"\n❌ Regressions (> {args.threshold:.0%} slower): {', '.join(regressions)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
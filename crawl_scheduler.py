@@ -0,0 +1,230 @@
+"""
+crawl_scheduler.py
+Adaptive per-feed crawl scheduler: a daemon that keeps the article
+collection fresh instead of a fixed daily batch.
+
+For every feed in RSS_FEEDS it tracks the observed publish rate (new URLs per
+hour, smoothed) and re-polls roughly when TARGET_NEW_PER_POLL new items are
+expected, within [MIN_INTERVAL, MAX_INTERVAL]. Busy feeds are polled more often
+and with a larger item limit when a poll comes back saturated (the limit
+drifts back to DEFAULT_LIMIT once they calm down); slow feeds back off. A
+feed's first poll only seeds its seen URLs, since its whole backlog would
+otherwise count as new. Failing feeds (errors, empty responses) back off
+exponentially up to MAX_BACKOFF. Sources without a feed URL ("manual crawl needed") are reported
+and skipped.
+
+New URLs go through the same extraction as the dataset builder and are stored
+with `fetch_process_upload.store_articles`. State is persisted in
+data/crawl_state.json so restarts keep the learned schedule.
+
+    python crawl_scheduler.py            # run forever
+    python crawl_scheduler.py --once     # poll whatever is due, then exit
+"""
+
+import argparse
+import heapq
+import json
+import os
+import random
+import time
+from pathlib import Path
+
+import data_access
+import metrics
+from fetch_process_upload import analyze_sentiment, detect_language, store_articles
+from insightbot_dataset_builder import RSS_FEEDS, fetch_article, fetch_feed_urls
+
+# ---------------------------
+# Config
+# ---------------------------
+STATE_PATH = Path("data/crawl_state.json")
+MIN_INTERVAL = 5 * 60
+MAX_INTERVAL = 6 * 3600
+DEFAULT_INTERVAL = 30 * 60
+MAX_BACKOFF = 24 * 3600
+TARGET_NEW_PER_POLL = 5
+RATE_SMOOTHING = 0.3       # EWMA weight of the latest observation
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+SEEN_PER_FEED = 500        # URLs remembered per feed for dedup
+
+# ---------------------------
+# Feed state
+# ---------------------------
+def new_feed_state(source, feed_url):
+    return {
+        "source": source,
+        "feed": feed_url,
+        "interval": DEFAULT_INTERVAL,
+        "next_poll": 0,
+        "last_poll": None,
+        "rate_per_hour": None,
+        "limit": DEFAULT_LIMIT,
+        "last_limit": None,
+        "failures": 0,
+        "polls": 0,
+        "new_total": 0,
+        "seen": [],
+    }
+
+def load_state(path=STATE_PATH) -> dict:
+    state = {}
+    if path.exists():
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    for source, feeds in RSS_FEEDS.items():
+        for feed_url in feeds:
+            state.setdefault(feed_url, new_feed_state(source, feed_url))
+    # Drop feeds removed from RSS_FEEDS
+    configured = {f for feeds in RSS_FEEDS.values() for f in feeds}
+    return {k: v for k, v in state.items() if k in configured}
+
+def save_state(state, path=STATE_PATH):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+# ---------------------------
+# Scheduling
+# ---------------------------
+def _jitter(seconds):
+    # Spread polls so feeds sharing a host don't line up
+    return seconds * random.uniform(0.9, 1.1)
+
+def record_success(feed, new_count, window, now, seeding=False):
+    """Update the rate estimate and schedule from a poll where `new_count` of
+    the first `window` items were unseen. A seeding poll only schedules."""
+    feed["failures"] = 0
+    if seeding:
+        interval = feed["interval"]
+    else:
+        if feed["last_poll"] is not None:
+            hours = max((now - feed["last_poll"]) / 3600, 1e-3)
+            observed = new_count / hours
+            prev = feed["rate_per_hour"]
+            feed["rate_per_hour"] = observed if prev is None else (
+                RATE_SMOOTHING * observed + (1 - RATE_SMOOTHING) * prev
+            )
+
+        if window and new_count >= window:
+            # Every item was new: we probably missed some, poll sooner and deeper
+            feed["limit"] = min(feed["limit"] * 2, MAX_LIMIT)
+            interval = feed["interval"] / 2
+        else:
+            if new_count * 2 <= feed["limit"]:
+                feed["limit"] = max(feed["limit"] - feed["limit"] // 4, DEFAULT_LIMIT)
+            if feed["rate_per_hour"]:
+                interval = TARGET_NEW_PER_POLL / feed["rate_per_hour"] * 3600
+            else:
+                interval = feed["interval"] * 1.5  # nothing new yet: slow down gradually
+
+    feed["interval"] = min(max(interval, MIN_INTERVAL), MAX_INTERVAL)
+    feed["last_poll"] = now
+    feed["next_poll"] = now + _jitter(feed["interval"])
+
+def record_failure(feed, now):
+    feed["failures"] += 1
+    backoff = min(DEFAULT_INTERVAL * 2 ** feed["failures"], MAX_BACKOFF)
+    feed["next_poll"] = now + _jitter(backoff)
+
+# ---------------------------
+# Polling
+# ---------------------------
+def poll_feed(feed, max_articles=None) -> int:
+    """Poll one feed, store its new articles. Returns the number stored."""
+    source, feed_url = feed["source"], feed["feed"]
+    now = time.time()
+    limit = feed["limit"]
+    with metrics.timer("feed_fetch_seconds", source=source):
+        urls = fetch_feed_urls(feed_url, limit=limit)
+    feed["polls"] += 1
+    if not urls:
+        record_failure(feed, now)
+        metrics.inc("feed_polls_total", source=source, status="failed")
+        print(f"⚠️ {source}: no items from {feed_url} (failure #{feed['failures']})")
+        return 0
+
+    seeding = not feed["seen"]
+    seen = set(feed["seen"])
+    unseen = [u for u in urls if u not in seen]
+    # Items past the previous poll's limit only surfaced because the limit grew:
+    # they are backlog, not new publishes
+    window = urls[:feed.get("last_limit") or limit]
+    published = sum(u not in seen for u in window)
+    # Also skip URLs already stored (e.g. by the batch builder or another feed)
+    fresh = [u for u in unseen if not data_access.find_article(u, projection={"_id": 1})]
+
+    records = []
+    for url in fresh[:max_articles] if max_articles else fresh:
+        try:
+            rec = fetch_article(url, source)
+        except Exception as e:
+            metrics.inc("articles_total", source=source, status="error")
+            print(f"❌ Failed {url}: {e}")
+            continue
+        body = rec.get("body") or ""
+        if not body:
+            metrics.inc("articles_total", source=source, status="empty")
+            continue
+        rec.setdefault("source", source)
+        rec["language"] = rec.get("language") or detect_language(body)
+        rec["sentiment"] = analyze_sentiment(body, rec["language"])
+        records.append(rec)
+        metrics.inc("articles_total", source=source, status="new")
+
+    stored = store_articles(records)
+    feed["seen"] = (feed["seen"] + unseen)[-SEEN_PER_FEED:]
+    feed["new_total"] += stored
+    record_success(feed, published, len(window), now, seeding=seeding)
+    feed["last_limit"] = limit
+    metrics.inc("feed_polls_total", source=source, status="ok")
+    print(f"✅ {source}: {len(urls)} items, {len(fresh)} new, {stored} stored"
+          f"{' (seeding)' if seeding else ''}; next poll in {feed['interval'] / 60:.0f} min")
+    return stored
+
+def run(state, once=False, max_articles=None, state_path=STATE_PATH):
+    manual = [s for s, feeds in RSS_FEEDS.items() if not feeds]
+    if manual:
+        print(f"ℹ️ No feed configured (manual crawl needed), skipped: {', '.join(manual)}")
+
+    queue = [(feed["next_poll"], url) for url, feed in state.items()]
+    heapq.heapify(queue)
+    while queue:
+        due, url = queue[0]
+        now = time.time()
+        if due > now:
+            if once:
+                break
+            time.sleep(min(due - now, 60))
+            continue
+        heapq.heappop(queue)
+        feed = state[url]
+        try:
+            poll_feed(feed, max_articles)
+        except Exception as e:
+            record_failure(feed, time.time())
+            print(f"⚠️ {feed['source']}: poll failed: {e}")
+        save_state(state, state_path)
+        heapq.heappush(queue, (feed["next_poll"], url))
+
+# ---------------------------
+# Run
+# ---------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Adaptive per-feed crawl scheduler")
+    parser.add_argument("--once", action="store_true", help="poll due feeds once and exit")
+    parser.add_argument("--state", type=Path, default=STATE_PATH)
+    parser.add_argument("--max-articles", type=int, default=None,
+                        help="cap on articles fetched per poll")
+    args = parser.parse_args()
+
+    state = load_state(args.state)
+    try:
+        run(state, once=args.once, max_articles=args.max_articles, state_path=args.state)
+    except KeyboardInterrupt:
+        print("\n🛑 Stopping scheduler")
+    finally:
+        save_state(state, args.state)
+        metrics.dump_report("crawl_scheduler")
@@ -0,0 +1,356 @@
+"""
+data_access.py
+Shared MongoDB access for the web app, the async app and the batch scripts.
+
+- One pooled MongoClient (and one AsyncMongoClient) per process, created on
+  first use and recreated after a fork.
+- List/detail projections and the hot read queries live here, each backed by
+  an index from `ensure_indexes()`.
+- The read endpoints of async_app.py use `*_async` counterparts that share
+  the sync helpers' filters, sorts and projections.
+- With INSIGHTBOT_EXPLAIN_QUERIES=1 every query helper, sync and async, runs
+  `explain()` first (finds, aggregations and `distinct` alike) and warns when
+  the winning plan contains a collection scan. Only `count_articles`, which
+  reads collection metadata, has no plan to check.
+
+Connection settings come from the environment (MONGO_URI, INSIGHTBOT_DB,
+MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE, MONGO_SERVER_SELECTION_TIMEOUT_MS,
+MONGO_CONNECT_TIMEOUT_MS, MONGO_SOCKET_TIMEOUT_MS).
+"""
+
+import os
+import threading
+
+from pymongo import MongoClient, ASCENDING, DESCENDING, TEXT
+
+import metrics
+import term_stats
+import topics
+
+# ---------------------------
+# Config
+# ---------------------------
+MONGO_URI = os.environ.get("MONGO_URI", "mongodb://localhost:27017")
+DB_NAME = os.environ.get("INSIGHTBOT_DB", "insightbot")
+COLLECTION_NAME = "articles"
+
+CLIENT_OPTIONS = {
+    "maxPoolSize": int(os.environ.get("MONGO_MAX_POOL_SIZE", 50)),
+    "minPoolSize": int(os.environ.get("MONGO_MIN_POOL_SIZE", 0)),
+    "serverSelectionTimeoutMS": int(os.environ.get("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000)),
+    "connectTimeoutMS": int(os.environ.get("MONGO_CONNECT_TIMEOUT_MS", 5000)),
+    "socketTimeoutMS": int(os.environ.get("MONGO_SOCKET_TIMEOUT_MS", 30000)),
+}
+EXPLAIN_QUERIES = os.environ.get("INSIGHTBOT_EXPLAIN_QUERIES", "0").lower() not in ("", "0", "false", "no")
+
+# Fields returned for article lists (index page, JSON list endpoints)
+LIST_PROJECTION = {"title": 1, "url": 1, "language": 1, "sentiment": 1, "source": 1, "_id": 0}
+# Fields returned for the article modal
+DETAIL_PROJECTION = {
+    "title": 1, "body": 1, "source": 1, "language": 1, "sentiment": 1, "date": 1, "url": 1, "_id": 0
+}
+
+# Every hot query below is served by one of these
+ARTICLE_INDEXES = [
+    ([("url", ASCENDING)], {"name": "url"}),
+    ([("topic_lda", ASCENDING), ("topic_lda_prob", DESCENDING)], {"name": "topic_prob"}),
+    # Per-source lists and time windows ("last 24h from Reuters"), newest first
+    ([("source", ASCENDING), ("date", DESCENDING)], {"name": "source_date"}),
+    ([("date", DESCENDING)], {"name": "date"}),
+    # Articles carry ISO codes such as "unknown" in `language`, which text
+    # indexes would reject as a language override, so point it elsewhere.
+    ([("title", TEXT), ("body", TEXT)],
+     {"name": "text", "weights": {"title": 3, "body": 1},
+      "default_language": "none", "language_override": "text_language"}),
+]
+
+# ---------------------------
+# Clients
+# ---------------------------
+_lock = threading.Lock()
+_client = None
+_async_client = None
+_client_pid = None
+_db_override = None
+_indexes_ready = False
+
+def get_client() -> MongoClient:
+    global _client, _async_client, _client_pid, _indexes_ready
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _lock:
+            if _client is None or _client_pid != pid:
+                # MongoClient is not fork-safe: a forked worker gets its own pool
+                _client = MongoClient(MONGO_URI, **CLIENT_OPTIONS)
+                _async_client = None
+                _client_pid = pid
+                _indexes_ready = False
+    return _client
+
+def get_async_client():
+    """Per-process AsyncMongoClient with the same pool settings."""
+    global _async_client
+    get_client()  # resets the async client after a fork as well
+    if _async_client is None:
+        from pymongo import AsyncMongoClient
+        _async_client = AsyncMongoClient(MONGO_URI, **CLIENT_OPTIONS)
+    return _async_client
+
+def get_db():
+    if _db_override is not None:
+        return _db_override
+    return get_client()[DB_NAME]
+
+def get_collection():
+    return get_db()[COLLECTION_NAME]
+
+def get_async_collection():
+    return get_async_client()[DB_NAME][COLLECTION_NAME]
+
+def use_database(db):
+    """Point the layer at another Database object (benchmarks, load tests)."""
+    global _db_override, _indexes_ready
+    _db_override = db
+    _indexes_ready = False
+
+# ---------------------------
+# Indexes
+# ---------------------------
+def ensure_indexes(force=False):
+    """Create the indexes the hot queries rely on (once per process)."""
+    global _indexes_ready
+    if _indexes_ready and not force:
+        return
+    db = get_db()
+    collection = db[COLLECTION_NAME]
+    for keys, options in ARTICLE_INDEXES:
+        collection.create_index(keys, **options)
+    term_stats.ensure_term_indexes(db)
+    _indexes_ready = True
+
+# ---------------------------
+# Query explain (debug)
+# ---------------------------
+def _plan_stages(plan):
+    if not isinstance(plan, dict):
+        return
+    if "stage" in plan:
+        yield plan["stage"]
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            yield from _plan_stages(plan[key])
+    for child in plan.get("inputStages", []):
+        yield from _plan_stages(child)
+
+def _explain_stages(explained):
+    """Winning-plan stages of an explain result (find, distinct or aggregate)."""
+    yield from _plan_stages(explained.get("queryPlanner", {}).get("winningPlan", {}))
+    # Aggregations not pushed down into the query layer report a $cursor stage
+    for stage in explained.get("stages", []):
+        cursor = stage.get("$cursor", {})
+        yield from _plan_stages(cursor.get("queryPlanner", {}).get("winningPlan", {}))
+
+def _warn_collscan(stages, op, detail):
+    if "COLLSCAN" in stages:
+        metrics.inc("mongo_collscan_total", op=op)
+        print(f"⚠️ Collection scan in {op}: {detail} plan={stages}")
+    return stages
+
+def explain_find(collection, filter, sort=None, op="find"):
+    """Warn (and count) when `filter`/`sort` would scan the whole collection."""
+    cursor = collection.find(filter)
+    if sort:
+        cursor = cursor.sort(sort)
+    stages = list(_explain_stages(cursor.explain()))
+    return _warn_collscan(stages, op, f"filter={filter} sort={sort}")
+
+def explain_aggregate(collection, pipeline, op="aggregate"):
+    """Like `explain_find`, for an aggregation pipeline."""
+    explained = collection.database.command(
+        "explain", {"aggregate": collection.name, "pipeline": pipeline, "cursor": {}},
+        verbosity="queryPlanner",
+    )
+    stages = list(_explain_stages(explained))
+    return _warn_collscan(stages, op, f"pipeline={pipeline}")
+
+def explain_distinct(collection, key, op="distinct"):
+    """Like `explain_find`, for `distinct(key)`."""
+    explained = collection.database.command(
+        "explain", {"distinct": collection.name, "key": key}, verbosity="queryPlanner",
+    )
+    return _warn_collscan(list(_explain_stages(explained)), op, f"distinct={key}")
+
+def _find(filter, projection, sort=None, limit=0, skip=0, op="find"):
+    collection = get_collection()
+    if EXPLAIN_QUERIES:
+        explain_find(collection, filter, sort, op)
+    with metrics.timer("mongo_query_seconds", op=op):
+        cursor = collection.find(filter, projection)
+        if sort:
+            cursor = cursor.sort(sort)
+        if skip:
+            cursor = cursor.skip(skip)
+        if limit:
+            cursor = cursor.limit(limit)
+        return list(cursor)
+
+# ---------------------------
+# Queries
+# ---------------------------
+def list_sources() -> list:
+    collection = get_collection()
+    if EXPLAIN_QUERIES:
+        explain_distinct(collection, "source", op="distinct_sources")
+    with metrics.timer("mongo_query_seconds", op="distinct_sources"):
+        return sorted(collection.distinct("source"))
+
+def find_by_source(source: str, page=0, page_size=0) -> list:
+    """One page of a source's articles, newest first (all of them when page_size is 0)."""
+    return _find({"source": source}, LIST_PROJECTION, sort=[("date", DESCENDING)],
+                 limit=page_size, skip=page * page_size, op="find_by_source")
+
+def date_filter(date_from=None, date_to=None) -> dict:
+    """`date` range clause for datetime bounds (either may be None)."""
+    bounds = {}
+    if date_from:
+        bounds["$gte"] = date_from
+    if date_to:
+        bounds["$lte"] = date_to
+    return {"date": bounds} if bounds else {}
+
+def _recent_filter(source=None, date_from=None, date_to=None) -> dict:
+    filter = date_filter(date_from, date_to)
+    if source:
+        filter["source"] = source
+    return filter
+
+RECENT_SORT = [("date", DESCENDING)]
+
+def find_recent(source=None, date_from=None, date_to=None, limit=30) -> list:
+    """Newest-first articles in a date window, optionally for one source."""
+    return _find(_recent_filter(source, date_from, date_to), LIST_PROJECTION,
+                 sort=RECENT_SORT, limit=limit, op="find_recent")
+
+def iter_articles(fields, source=None, language=None, sentiment=None,
+                  date_from=None, date_to=None, limit=0, batch_size=1000):
+    """Lazily yield matching articles (newest first) with only `fields`.
+
+    Backed by a server-side cursor fetched `batch_size` documents at a time,
+    for exports that must not hold the result set in memory.
+    """
+    filter = date_filter(date_from, date_to)
+    for key, value in (("source", source), ("language", language), ("sentiment", sentiment)):
+        if value:
+            filter[key] = value
+    sort = [("date", DESCENDING)]
+    collection = get_collection()
+    if EXPLAIN_QUERIES:
+        explain_find(collection, filter, sort, op="export")
+    projection = dict.fromkeys(fields, 1)
+    projection["_id"] = 0
+    cursor = collection.find(filter, projection, batch_size=batch_size).sort(sort)
+    if limit:
+        cursor = cursor.limit(limit)
+    with cursor:
+        yield from cursor
+
+def _sample_pipeline(size: int) -> list:
+    return [{"$sample": {"size": size}}, {"$project": LIST_PROJECTION}]
+
+def sample_articles(size: int) -> list:
+    collection = get_collection()
+    if EXPLAIN_QUERIES:
+        explain_aggregate(collection, _sample_pipeline(size), op="sample")
+    with metrics.timer("mongo_query_seconds", op="sample"):
+        return list(collection.aggregate(_sample_pipeline(size)))
+
+def count_articles() -> int:
+    """Collection size from metadata; no scan."""
+    with metrics.timer("mongo_query_seconds", op="count"):
+        return get_collection().estimated_document_count()
+
+def find_article(url: str, projection=DETAIL_PROJECTION):
+    collection = get_collection()
+    if EXPLAIN_QUERIES:
+        explain_find(collection, {"url": url}, op="find_by_url")
+    with metrics.timer("mongo_query_seconds", op="find_by_url"):
+        return collection.find_one({"url": url}, projection)
+
+def search_articles(query: str, source=None, limit=30, date_from=None, date_to=None) -> list:
+    """Full-text search over title/body, best matches first."""
+    filter = {"$text": {"$search": query}, **date_filter(date_from, date_to)}
+    if source:
+        filter["source"] = source
+    projection = dict(LIST_PROJECTION, score={"$meta": "textScore"})
+    articles = _find(filter, projection, sort=[("score", {"$meta": "textScore"})],
+                     limit=limit, op="search")
+    for art in articles:
+        art.pop("score", None)
+    return articles
+
+def top_terms(n=50, language=None, source=None, day_from=None, day_to=None) -> list:
+    name, pipeline = term_stats.top_terms_pipeline(n, language, source, day_from, day_to)
+    collection = get_db()[name]
+    if EXPLAIN_QUERIES:
+        explain_aggregate(collection, pipeline, op="top_terms")
+    with metrics.timer("mongo_query_seconds", op="top_terms"):
+        return [
+            {"term": row["_id"], "count": row["count"]}
+            for row in collection.aggregate(pipeline)
+        ]
+
+def find_by_topic(topic: int, page=0, page_size=20) -> list:
+    """One page of a topic's articles, most representative first."""
+    collection = get_collection()
+    sort = [("topic_lda_prob", DESCENDING)]
+    if EXPLAIN_QUERIES:
+        explain_find(collection, {"topic_lda": topic}, sort, op="find_by_topic")
+    with metrics.timer("mongo_query_seconds", op="find_by_topic"):
+        cursor = collection.find({"topic_lda": topic}, LIST_PROJECTION).sort(sort)
+        return list(cursor.skip(page * page_size).limit(page_size))
+
+def topic_summaries() -> list:
+    """Precomputed per-topic keywords, counts and top articles."""
+    collection = get_db()[topics.TOPIC_STATS_COLLECTION]
+    sort = [("_id", ASCENDING)]
+    if EXPLAIN_QUERIES:
+        explain_find(collection, {}, sort, op="topic_summaries")
+    with metrics.timer("mongo_query_seconds", op="topic_summaries"):
+        return [dict(doc, topic=doc.pop("_id")) for doc in collection.find().sort(sort)]
+
+# ---------------------------
+# Async queries
+# ---------------------------
+# Counterparts of the helpers above for async_app.py, on the AsyncMongoClient.
+# They share the filters, sorts and projections of the sync versions.
+async def _find_async(filter, projection, sort=None, limit=0, op="find"):
+    if EXPLAIN_QUERIES:
+        explain_find(get_collection(), filter, sort, op)  # debug only: blocks the loop
+    with metrics.timer("mongo_query_seconds", op=op):
+        cursor = get_async_collection().find(filter, projection)
+        if sort:
+            cursor = cursor.sort(sort)
+        if limit:
+            cursor = cursor.limit(limit)
+        return await cursor.to_list()
+
+async def find_recent_async(source=None, date_from=None, date_to=None, limit=30) -> list:
+    return await _find_async(_recent_filter(source, date_from, date_to), LIST_PROJECTION,
+                             sort=RECENT_SORT, limit=limit, op="find_recent")
+
+async def sample_articles_async(size: int) -> list:
+    if EXPLAIN_QUERIES:
+        explain_aggregate(get_collection(), _sample_pipeline(size), op="sample")
+    with metrics.timer("mongo_query_seconds", op="sample"):
+        cursor = await get_async_collection().aggregate(_sample_pipeline(size))
+        return await cursor.to_list()
+
+async def count_articles_async() -> int:
+    with metrics.timer("mongo_query_seconds", op="count"):
+        return await get_async_collection().estimated_document_count()
+
+async def find_article_async(url: str, projection=DETAIL_PROJECTION):
+    if EXPLAIN_QUERIES:
+        explain_find(get_collection(), {"url": url}, op="find_by_url")
+    with metrics.timer("mongo_query_seconds", op="find_by_url"):
+        return await get_async_collection().find_one({"url": url}, projection)
@@ -0,0 +1,143 @@
+"""
+dates.py
+Article dates as native datetimes.
+
+Dates reach the pipeline as millisecond timestamps (dataset builder), ISO
+strings (preprocessed exports), `{"$date": ...}` objects (mongoexport) or not
+at all (fetch_process_upload). Everything is normalized at ingest to a naive
+UTC datetime, which pymongo stores as a BSON date, with the fetch time as the
+fallback. Range filters and newest-first sorts then run on the (source, date)
+and (date) indexes.
+
+Run directly to migrate an existing collection: every article whose `date` is
+not a BSON date is rewritten, falling back to the document's insert time
+(from its ObjectId) when the stored value cannot be parsed. The migration
+also drops the old (source, _id) index `source_id`, which the (source, date)
+index replaces.
+"""
+
+import re
+from datetime import datetime, timedelta, timezone
+
+# ---------------------------
+# Parsing
+# ---------------------------
+# Below this an epoch number is taken to be in seconds rather than milliseconds
+_MS_THRESHOLD = 10**11
+
+_RELATIVE_RE = re.compile(r"^(\d+)\s*([mhdw])$")
+_DATE_ONLY_RE = re.compile(r"^\d{4}-?\d{2}-?\d{2}$")
+_RELATIVE_UNITS = {"m": "minutes", "h": "hours", "d": "days", "w": "weeks"}
+
+def _to_utc(dt: datetime) -> datetime:
+    """Naive UTC, the form pymongo stores and returns."""
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+def parse_date(value):
+    """Datetime (naive UTC) for a stored/scraped date value, or None."""
+    if isinstance(value, dict) and "$date" in value:
+        value = value["$date"]
+        if isinstance(value, dict):  # {"$date": {"$numberLong": "..."}}
+            value = int(value.get("$numberLong", 0)) or None
+    if isinstance(value, datetime):
+        return _to_utc(value)
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        try:
+            seconds = value / 1000 if abs(value) >= _MS_THRESHOLD else value
+            return datetime.fromtimestamp(seconds, tz=timezone.utc).replace(tzinfo=None)
+        except (OverflowError, OSError, ValueError):
+            return None
+    if isinstance(value, str) and value.strip():
+        value = value.strip()
+        if value.lstrip("-").isdigit():
+            return parse_date(int(value))
+        try:
+            return _to_utc(datetime.fromisoformat(value.replace("Z", "+00:00")))
+        except ValueError:
+            return None
+    return None
+
+def normalize_dates(records, fetched_at=None):
+    """Set each record's `date` to a datetime, using `fetched_at` (or now) when missing."""
+    fallback = _to_utc(fetched_at or datetime.now(timezone.utc))
+    for rec in records:
+        rec["date"] = parse_date(rec.get("date")) or fallback
+    return records
+
+def parse_range_value(value, end=False, now=None):
+    """Datetime bound for a `from`/`to` request argument.
+
+    Accepts ISO dates/datetimes ("2025-01-31", "2025-01-31T12:00") and
+    relative ages such as "24h", "7d", "30m", "2w" (that long before now).
+    A bare date used as an `end` bound covers the whole day. Raises
+    ValueError on anything else.
+    """
+    value = value.strip()
+    match = _RELATIVE_RE.match(value.lower())
+    if match:
+        now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+        return now - timedelta(**{_RELATIVE_UNITS[match.group(2)]: int(match.group(1))})
+    dt = _to_utc(datetime.fromisoformat(value.replace("Z", "+00:00")))
+    if end and _DATE_ONLY_RE.match(value):
+        dt += timedelta(days=1) - timedelta(microseconds=1)
+    return dt
+
+def parse_range(date_from=None, date_to=None):
+    """(from, to) datetimes for optional request arguments; ValueError if malformed."""
+    return (
+        parse_range_value(date_from) if date_from else None,
+        parse_range_value(date_to, end=True) if date_to else None,
+    )
+
+def to_day(dt):
+    """'YYYY-MM-DD' for a datetime bound (term_counts bucket key), or None."""
+    return dt.strftime("%Y-%m-%d") if dt else None
+
+def format_date(value) -> str:
+    """Display form used by the article modal ('YYYY-MM-DD HH:MM')."""
+    dt = parse_date(value)
+    if dt is None:
+        return value if isinstance(value, str) else ""
+    return dt.strftime("%Y-%m-%d %H:%M")
+
+# ---------------------------
+# Migration
+# ---------------------------
+def migrate_dates(collection, batch_size=1000) -> int:
+    """Rewrite non-BSON-date `date` fields in place. Returns documents updated."""
+    from pymongo import UpdateOne
+
+    updated = 0
+    ops = []
+    cursor = collection.find({"date": {"$not": {"$type": "date"}}}, {"date": 1})
+    for doc in cursor:
+        date = parse_date(doc.get("date")) or _to_utc(doc["_id"].generation_time)
+        ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"date": date}}))
+        if len(ops) >= batch_size:
+            updated += collection.bulk_write(ops, ordered=False).modified_count
+            ops = []
+    if ops:
+        updated += collection.bulk_write(ops, ordered=False).modified_count
+    return updated
+
+# ---------------------------
+# Run
+# ---------------------------
+OBSOLETE_INDEXES = ["source_id"]
+
+if __name__ == "__main__":
+    import data_access
+
+    collection = data_access.get_collection()
+    updated = migrate_dates(collection)
+    existing = collection.index_information()
+    for name in OBSOLETE_INDEXES:
+        if name in existing:
+            collection.drop_index(name)
+            print(f"🗑️ Dropped obsolete index {name}")
+    data_access.ensure_indexes(force=True)
+    print(f"✅ Normalized dates on {updated} articles in {collection.name}")
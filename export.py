@@ -0,0 +1,161 @@
+"""
+export.py
+Streaming serializers for the /export endpoint.
+
+Each writer takes an iterator of article dicts (a server-side cursor from
+`store.iter_articles`) and yields encoded chunks of roughly CHUNK_ROWS
+articles, so the web process only ever holds one chunk no matter how large
+the export is.
+
+Formats: NDJSON, CSV and Parquet (row group per chunk; needs the optional
+pyarrow package).
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+from itertools import islice
+
+import metrics
+
+# ---------------------------
+# Config
+# ---------------------------
+CHUNK_ROWS = 500
+
+# Exportable fields and their Parquet types
+EXPORT_FIELDS = {
+    "url": "string",
+    "source": "string",
+    "title": "string",
+    "body": "string",
+    "language": "string",
+    "sentiment": "string",
+    "date": "timestamp",
+    "author": "string",
+    "category": "string",
+    "tags": "list",
+    "summary": "string",
+    "length": "int",
+    "topic_lda": "int",
+    "topic_lda_prob": "float",
+}
+DEFAULT_FIELDS = ["url", "source", "title", "language", "sentiment", "date"]
+
+FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv", "csv"),  # Flask adds "; charset=utf-8" to text/* types
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+def parse_fields(value) -> list:
+    """Field list from a comma-separated argument; ValueError on unknown names."""
+    if not value:
+        return list(DEFAULT_FIELDS)
+    fields = [f.strip() for f in value.split(",") if f.strip()]
+    if not fields:
+        raise ValueError("fields must name at least one field")
+    unknown = [f for f in fields if f not in EXPORT_FIELDS]
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(unknown)}")
+    return list(dict.fromkeys(fields))
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def _chunks(rows, size=CHUNK_ROWS):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+def _text_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat() + "Z"
+    return value
+
+# ---------------------------
+# Writers
+# ---------------------------
+def ndjson_chunks(rows, fields):
+    for chunk in _chunks(rows):
+        lines = (
+            json.dumps({f: _text_value(art.get(f)) for f in fields}, ensure_ascii=False)
+            for art in chunk
+        )
+        metrics.inc("export_rows_total", len(chunk), format="ndjson")
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+def csv_chunks(rows, fields):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for chunk in _chunks(rows):
+        for art in chunk:
+            writer.writerow([
+                ";".join(map(str, v)) if isinstance(v, list) else _text_value(v)
+                for v in (art.get(f) for f in fields)
+            ])
+        metrics.inc("export_rows_total", len(chunk), format="csv")
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+class _DrainableSink:
+    """Write-only file object whose contents are handed out and dropped per chunk."""
+
+    def __init__(self):
+        self._parts = []
+        self._pos = 0
+        self.closed = False
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._pos
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+def parquet_chunks(rows, fields):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    types = {
+        "string": pa.string(), "timestamp": pa.timestamp("ms"), "list": pa.list_(pa.string()),
+        "int": pa.int64(), "float": pa.float64(),
+    }
+    schema = pa.schema([(f, types[EXPORT_FIELDS[f]]) for f in fields])
+    sink = _DrainableSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        for chunk in _chunks(rows):
+            columns = {f: [art.get(f) for art in chunk] for f in fields}
+            writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+            metrics.inc("export_rows_total", len(chunk), format="parquet")
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+WRITERS = {"ndjson": ndjson_chunks, "csv": csv_chunks, "parquet": parquet_chunks}
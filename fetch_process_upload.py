@@ -1,18 +1,19 @@
+import os
 import re
+import threading
 from urllib.parse import urlparse
 
 from newspaper import build
-from pymongo import MongoClient
 from langdetect import detect
 from textblob import TextBlob
-from transformers import pipeline
 
-# ---------------------------
-# MongoDB Config
-# ---------------------------
-MONGO_URI = "mongodb://localhost:27017"
-DB_NAME = "insightbot"
-COLLECTION_NAME = "articles"
+import data_access
+import metrics
+from dates import normalize_dates
+from sentiment_model import load_sentiment_model, stars_to_sentiment
+from sentiment_service import SentimentClient
+from term_stats import update_term_counts
+from topics import assign_topics, refresh_topic_stats
 
 # ---------------------------
 # Utils
@@ -25,13 +26,15 @@ def clean_text(text: str) -> str:
 
 def detect_language(text: str) -> str:
     try:
-        return detect(text)
+        with metrics.timer("language_detect_seconds"):
+            return detect(text)
     except:
         return "unknown"
 
 def analyze_sentiment(text: str, lang: str) -> str:
     if lang == "en":
-        polarity = TextBlob(text).sentiment.polarity
+        with metrics.timer("sentiment_seconds", backend="textblob"):
+            polarity = TextBlob(text).sentiment.polarity
         if polarity > 0.05:
             return "positive"
         elif polarity < -0.05:
@@ -39,48 +42,87 @@ def analyze_sentiment(text: str, lang: str) -> str:
         else:
             return "neutral"
     else:
-        result = sentiment_model(text[:512])[0]
-        stars = int(result["label"].split()[0])
-        if stars <= 2:
-            return "negative"
-        elif stars == 3:
-            return "neutral"
-        else:
-            return "positive"
+        with metrics.timer("sentiment_seconds", backend="bert"):
+            result = get_sentiment_model()(text[:512])[0]
+        return stars_to_sentiment(result)
 
 # ---------------------------
 # Load Sentiment Model
 # ---------------------------
-print("🔹 Loading multilingual sentiment model...")
-sentiment_model = pipeline(
-    "sentiment-analysis",
-    model="nlptown/bert-base-multilingual-uncased-sentiment"
-)
+# Loaded on first use. With INSIGHTBOT_SENTIMENT_SOCKET set, requests go to the
+# shared sentiment_service process instead of a per-process copy of the model.
+sentiment_model = None
+_model_lock = threading.Lock()
+
+def get_sentiment_model():
+    global sentiment_model
+    if sentiment_model is None:
+        with _model_lock:
+            if sentiment_model is None:
+                socket_path = os.environ.get("INSIGHTBOT_SENTIMENT_SOCKET")
+                if socket_path:
+                    sentiment_model = SentimentClient(socket_path)
+                else:
+                    sentiment_model = load_sentiment_model()
+    return sentiment_model
+
+# ---------------------------
+# Storage
+# ---------------------------
+def store_articles(records) -> int:
+    """Insert new article records and update the term/topic summaries.
+
+    Dates are normalized to datetimes first; records without one get the
+    fetch time.
+    """
+    if not records:
+        return 0
+    normalize_dates(records)
+    db = data_access.get_db()
+    collection = db[data_access.COLLECTION_NAME]
+    data_access.ensure_indexes()
+    touched_topics = assign_topics(records)
+    with metrics.timer("mongo_query_seconds", op="insert_many"):
+        collection.insert_many(records)
+    update_term_counts(db, records)
+    refresh_topic_stats(db, collection, touched_topics)
+    return len(records)
 
 # ---------------------------
 # Main Pipeline
 # ---------------------------
-def process_website(url: str):
+def process_website(url: str, on_insert=None):
+    """Fetch, analyze and store new articles from `url`.
+
+    `on_insert(domain)` is called after new articles are stored or
+    existing ones updated (the web app uses it to invalidate cached fragments).
+    """
     print(f"\n🌐 Fetching articles from {url} ...")
     domain = urlparse(url).netloc.replace("www.", "")
 
-    site = build(url, memoize_articles=False)
-    client = MongoClient(MONGO_URI)
-    collection = client[DB_NAME][COLLECTION_NAME]
+    with metrics.timer("site_build_seconds", source=domain):
+        site = build(url, memoize_articles=False)
+    collection = data_access.get_collection()
+    data_access.ensure_indexes()
 
     new_articles = []
     updated_articles = 0
 
     for article in site.articles:  # fetch ALL articles
         try:
-            article.download()
-            article.parse()
-            body = clean_text(article.text)
+            with metrics.timer("fetch_seconds", source=domain):
+                article.download()
+            with metrics.timer("parse_seconds", source=domain):
+                article.parse()
+                body = clean_text(article.text)
             if not body:
+                metrics.inc("articles_total", source=domain, status="empty")
                 continue
 
             # Deduplication check
-            existing = collection.find_one({"url": article.url})
+            existing = data_access.find_article(
+                article.url, projection={"_id": 1, "language": 1, "sentiment": 1}
+            )
             if existing:
                 # Update sentiment if missing
                 if "sentiment" not in existing or not existing["sentiment"]:
@@ -91,6 +133,9 @@ def process_website(url: str):
                         {"$set": {"sentiment": sentiment}}
                     )
                     updated_articles += 1
+                    metrics.inc("articles_total", source=domain, status="updated")
+                else:
+                    metrics.inc("articles_total", source=domain, status="duplicate")
                 continue
 
             lang = detect_language(body)
@@ -100,18 +145,22 @@ def process_website(url: str):
                 "url": article.url,
                 "source": domain,
                 "title": article.title,
+                "date": article.publish_date,  # None when newspaper finds none: fetch time is used
                 "body": body,
                 "language": lang,
                 "sentiment": sentiment,
             }
             new_articles.append(record)
+            metrics.inc("articles_total", source=domain, status="new")
 
         except Exception as e:
+            metrics.inc("articles_total", source=domain, status="error")
             print(f"⚠️ Skipped an article: {e}")
 
     # Upload only new articles to MongoDB
-    if new_articles:
-        collection.insert_many(new_articles)
+    store_articles(new_articles)
+    if on_insert and (new_articles or updated_articles):
+        on_insert(domain)
 
     # Summary
     print(f"\n✅ Upload complete for {domain}:")
@@ -120,7 +169,7 @@ def process_website(url: str):
 
     # List all articles for this site
     print("\n📑 Articles from this website:")
-    for art in collection.find({"source": domain}, {"title": 1, "url": 1, "_id": 0}):
+    for art in data_access.find_by_source(domain):
         print(f"- {art['title']} → {art['url']}")
 
 # ---------------------------
@@ -130,5 +179,6 @@ if __name__ == "__main__":
     site_url = input("🔹 Enter website URL to fetch articles: ").strip()
     if site_url:
         process_website(site_url)
+        metrics.dump_report("fetch_process_upload")
     else:
         print("❌ No URL provided.")
@@ -0,0 +1,64 @@
+"""
+fragment_cache.py
+Small thread-safe LRU cache for rendered HTML fragments.
+
+Entries expire after `ttl` seconds, which bounds staleness for inserts made by
+other processes; inserts made in-process invalidate the affected keys
+directly via `invalidate()`. A render that is still running when its key is
+invalidated returns its value but does not store it, since it may predate
+the insert.
+"""
+
+import itertools
+import threading
+import time
+from collections import OrderedDict
+
+import metrics
+
+class FragmentCache:
+    def __init__(self, max_entries=256, ttl=60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._generation = {}          # key -> generation of the render allowed to store
+        self._next_generation = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def get_or_render(self, key, render):
+        """Cached value for `key`, calling `render()` on a miss or expiry."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                metrics.inc("fragment_cache_total", result="hit")
+                return entry[1]
+
+            generation = self._generation[key] = next(self._next_generation)
+
+        metrics.inc("fragment_cache_total", result="miss")
+        try:
+            value = render()
+        except BaseException:
+            with self._lock:
+                if self._generation.get(key) == generation:
+                    del self._generation[key]
+            raise
+        with self._lock:
+            # Skipped when invalidate() (or a newer render of the key) ran meanwhile
+            if self._generation.get(key) == generation:
+                del self._generation[key]
+                self._entries[key] = (now + self.ttl, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, predicate):
+        """Drop every entry whose key satisfies `predicate(key)`, including in-flight renders."""
+        with self._lock:
+            for key in [k for k in self._entries if predicate(k)]:
+                del self._entries[key]
+            for key in [k for k in self._generation if predicate(k)]:
+                del self._generation[key]
@@ -8,6 +8,8 @@ from bs4 import BeautifulSoup
 from datetime import datetime
 from urllib.parse import urljoin
 
+import metrics
+
 # ------------------------
 # Base + Extractors (reuse from site_extractors.py)
 # ------------------------
@@ -90,6 +92,25 @@ def fetch_from_sitemap(sitemap_url, limit=50):
         print(f"⚠️ Sitemap fetch failed: {sitemap_url} -> {e}")
         return []
 
+def fetch_feed_urls(feed_url, limit=50):
+    """Article URLs from an RSS feed or, for *.xml sitemaps, from the sitemap."""
+    if feed_url.endswith('.xml') and 'rss' not in feed_url:
+        return fetch_from_sitemap(feed_url, limit=limit)
+    return fetch_article_urls(feed_url, limit=limit)
+
+# ------------------------
+# Fetch + extract a single article
+# ------------------------
+def fetch_article(url, source):
+    with metrics.timer("fetch_seconds", source=source):
+        r = requests.get(url, headers={"User-Agent":"InsightBot/1.0"}, timeout=20)
+        r.raise_for_status()
+    html = r.text
+    with metrics.timer("parse_seconds", source=source):
+        rec = extract_article_from_site(html, url, source)
+        soup = BeautifulSoup(html, "html.parser")
+        return enrich_article(rec, soup)
+
 # ------------------------
 # Enhance extraction with SRS fields
 # ------------------------
@@ -138,21 +159,17 @@ if __name__=="__main__":
     for source, feeds in RSS_FEEDS.items():
         for feed in feeds:
             print(f"\n📡 Fetching from {source} RSS: {feed}")
-            if feed.endswith('.xml') and 'rss' not in feed:
-                urls = fetch_from_sitemap(feed, limit=20)
-            else:
-                urls = fetch_article_urls(feed, limit=20)  # limit per feed
+            with metrics.timer("feed_fetch_seconds", source=source):
+                urls = fetch_feed_urls(feed, limit=20)  # limit per feed
+            metrics.inc("feed_urls_total", len(urls), source=source)
             for url in urls:
                 try:
-                    r = requests.get(url, headers={"User-Agent":"InsightBot/1.0"}, timeout=20)
-                    r.raise_for_status()
-                    html = r.text
-                    rec = extract_article_from_site(html, url, source)
-                    soup = BeautifulSoup(html, "html.parser")
-                    rec = enrich_article(rec, soup)
+                    rec = fetch_article(url, source)
                     records.append(rec)
+                    metrics.inc("articles_total", source=source, status="ok")
                     print(f"✅ {source}: {rec['title'][:70]}")
                 except Exception as e:
+                    metrics.inc("articles_total", source=source, status="error")
                     print(f"❌ Failed {url}: {e}")
 
     if records:
@@ -165,3 +182,5 @@ if __name__=="__main__":
         print(f"\n✅ Dataset saved:\n- {csv_path}\n- {json_path}")
     else:
         print("⚠️ No records extracted.")
+
+    metrics.dump_report("dataset_builder")
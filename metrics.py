@@ -0,0 +1,236 @@
+"""
+metrics.py
+Lightweight timers, counters and histograms for the pipeline and web app.
+
+Disabled unless INSIGHTBOT_METRICS=1. When disabled, `timer()` hands back a
+shared no-op context manager and `inc()`/`observe()` return immediately, so
+instrumented code pays a single flag check.
+
+    with metrics.timer("fetch_seconds", source=domain):
+        article.download()
+    metrics.inc("articles_total", source=domain, status="new")
+
+The web app exposes the registry in Prometheus text format at /metrics; batch
+scripts call `dump_report("<script>")` to write a JSON report under
+data/metrics/.
+
+The registry lives in each process. With several server workers (hypercorn
+`workers = 4`), set INSIGHTBOT_METRICS_MULTIPROC_DIR to a directory shared by
+the workers: each one writes its registry to `<pid>.json` there every
+FLUSH_SECONDS, and /metrics serves the sum over all files. Clear the
+directory when the server (re)starts.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+from datetime import datetime
+from pathlib import Path
+
+# ---------------------------
+# Config
+# ---------------------------
+ENABLED = os.environ.get("INSIGHTBOT_METRICS", "0").lower() not in ("", "0", "false", "no")
+PREFIX = "insightbot_"
+METRICS_DIR = Path(os.environ.get("INSIGHTBOT_METRICS_DIR", "data/metrics"))
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+MULTIPROC_DIR = os.environ.get("INSIGHTBOT_METRICS_MULTIPROC_DIR")
+FLUSH_SECONDS = float(os.environ.get("INSIGHTBOT_METRICS_FLUSH_SECONDS", 5))
+
+_lock = threading.Lock()
+_counters = {}    # (name, labels) -> value
+_histograms = {}  # (name, labels) -> [bucket counts..., sum, count]
+_NULL_TIMER = nullcontext()
+_flusher_pid = None
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+# ---------------------------
+# Recording
+# ---------------------------
+def inc(name, value=1, **labels):
+    if not ENABLED:
+        return
+    if MULTIPROC_DIR and _flusher_pid != os.getpid():
+        _start_flusher()
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+def observe(name, value, **labels):
+    if not ENABLED:
+        return
+    if MULTIPROC_DIR and _flusher_pid != os.getpid():
+        _start_flusher()
+    key = _key(name, labels)
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = [0] * (len(BUCKETS) + 2)
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                hist[i] += 1
+        hist[-2] += value
+        hist[-1] += 1
+
+class _Timer:
+    __slots__ = ("name", "labels", "start")
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe(self.name, time.perf_counter() - self.start, **self.labels)
+        return False
+
+def timer(name, **labels):
+    """Context manager observing the elapsed seconds into histogram `name`."""
+    if not ENABLED:
+        return _NULL_TIMER
+    return _Timer(name, labels)
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+# ---------------------------
+# Multi-process aggregation
+# ---------------------------
+def _flush():
+    """Write this process's registry to MULTIPROC_DIR/<pid>.json."""
+    with _lock:
+        data = {
+            "counters": [[name, list(labels), value] for (name, labels), value in _counters.items()],
+            "histograms": [[name, list(labels), list(h)] for (name, labels), h in _histograms.items()],
+        }
+    directory = Path(MULTIPROC_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{os.getpid()}.json"
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(data), encoding="utf-8")
+    os.replace(tmp, path)
+
+def _start_flusher():
+    global _flusher_pid
+    with _lock:
+        if _flusher_pid == os.getpid():
+            return
+        _flusher_pid = os.getpid()
+
+    def loop():
+        while True:
+            time.sleep(FLUSH_SECONDS)
+            try:
+                _flush()
+            except OSError as e:
+                print(f"⚠️ Could not write metrics to {MULTIPROC_DIR}: {e}")
+
+    threading.Thread(target=loop, daemon=True).start()
+
+def _merged():
+    """Counters and histograms summed over every process file in MULTIPROC_DIR."""
+    _flush()
+    counters, histograms = {}, {}
+    for path in Path(MULTIPROC_DIR).glob("*.json"):
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue  # being replaced by its writer
+        for name, labels, value in data["counters"]:
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, hist in data["histograms"]:
+            key = (name, tuple(map(tuple, labels)))
+            total = histograms.setdefault(key, [0] * len(hist))
+            for i, v in enumerate(hist):
+                total[i] += v
+    return counters, histograms
+
+# ---------------------------
+# Export
+# ---------------------------
+def _label_str(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    body = ",".join(
+        '{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in pairs
+    )
+    return "{" + body + "}"
+
+def render_prometheus() -> str:
+    """Registry in Prometheus text exposition format (version 0.0.4).
+
+    Summed over all worker processes when MULTIPROC_DIR is set.
+    """
+    lines = []
+    if MULTIPROC_DIR:
+        merged_counters, merged_histograms = _merged()
+        counters = sorted(merged_counters.items())
+        histograms = sorted(merged_histograms.items())
+    else:
+        with _lock:
+            counters = sorted(_counters.items())
+            histograms = sorted((k, list(v)) for k, v in _histograms.items())
+
+    seen = set()
+    for (name, labels), value in counters:
+        full = PREFIX + name
+        if full not in seen:
+            lines.append(f"# TYPE {full} counter")
+            seen.add(full)
+        lines.append(f"{full}{_label_str(labels)} {value}")
+
+    for (name, labels), hist in histograms:
+        full = PREFIX + name
+        if full not in seen:
+            lines.append(f"# TYPE {full} histogram")
+            seen.add(full)
+        for bound, count in zip(BUCKETS, hist):
+            lines.append(f"{full}_bucket{_label_str(labels, [('le', str(bound))])} {count}")
+        lines.append(f"{full}_bucket{_label_str(labels, [('le', '+Inf')])} {hist[-1]}")
+        lines.append(f"{full}_sum{_label_str(labels)} {hist[-2]}")
+        lines.append(f"{full}_count{_label_str(labels)} {hist[-1]}")
+    return "\n".join(lines) + "\n"
+
+def report() -> dict:
+    """Registry as plain JSON-friendly dicts, slowest timers first."""
+    with _lock:
+        counters = [
+            {"name": name, "labels": dict(labels), "value": value}
+            for (name, labels), value in sorted(_counters.items())
+        ]
+        timers = [
+            {
+                "name": name,
+                "labels": dict(labels),
+                "count": hist[-1],
+                "total_seconds": round(hist[-2], 6),
+                "mean_seconds": round(hist[-2] / hist[-1], 6) if hist[-1] else 0.0,
+            }
+            for (name, labels), hist in _histograms.items()
+        ]
+    timers.sort(key=lambda t: t["total_seconds"], reverse=True)
+    return {"counters": counters, "timers": timers}
+
+def dump_report(script_name: str):
+    """Write the JSON report for a batch run. Returns the path, or None if disabled."""
+    if not ENABLED:
+        return None
+    METRICS_DIR.mkdir(parents=True, exist_ok=True)
+    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    path = METRICS_DIR / f"{script_name}_{ts}.json"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report(), f, ensure_ascii=False, indent=2)
+    print(f"📊 Metrics report saved to {path}")
+    return path
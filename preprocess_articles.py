@@ -1,12 +1,14 @@
 import json
 import pandas as pd
 import matplotlib.pyplot as plt
-from collections import Counter
 from wordcloud import WordCloud
 import nltk
-from transformers import pipeline
 from pathlib import Path
 
+import metrics
+from sentiment_model import load_sentiment_model, stars_to_sentiment
+from term_stats import term_frequencies
+
 nltk.download("punkt")
 
 # ---------------------------
@@ -62,13 +64,12 @@ plt.close()
 # 3. Word Frequency (English only)
 # ---------------------------
 english_texts = df[df["language"] == "en"]["body"].astype(str).tolist()
-all_words = " ".join(english_texts).split()
-word_freq = Counter(all_words)
+word_freq = term_frequencies(english_texts)  # stopwords removed
 print("\n🔹 Top 20 Words (EN):", word_freq.most_common(20))
 
 # Wordcloud
-if english_texts:
-    wc = WordCloud(width=800, height=400, background_color="white").generate(" ".join(all_words))
+if word_freq:
+    wc = WordCloud(width=800, height=400, background_color="white").generate_from_frequencies(word_freq)
     wc.to_file(preprocessed_dir / "wordcloud_en.png")
 
 # ---------------------------
@@ -88,22 +89,13 @@ if "date" in df.columns:
 # ---------------------------
 # 5. Multilingual Sentiment Analysis
 # ---------------------------
-print("\n🔹 Loading multilingual sentiment model...")
-sentiment_analyzer = pipeline("sentiment-analysis", model="nlptown/bert-base-multilingual-uncased-sentiment")
-
-def map_sentiment(result):
-    label = result["label"]  # e.g., "5 stars"
-    stars = int(label.split()[0])
-    if stars <= 2:
-        return "negative"
-    elif stars == 3:
-        return "neutral"
-    else:
-        return "positive"
+sentiment_analyzer = load_sentiment_model()  # INSIGHTBOT_SENTIMENT_BACKEND=fp32|int8|onnx
 
 print("🔹 Running sentiment analysis...")
-results = sentiment_analyzer(df["body"].astype(str).tolist(), truncation=True)
-df["sentiment"] = [map_sentiment(res) for res in results]
+with metrics.timer("sentiment_seconds", backend="bert", mode="batch"):
+    results = sentiment_analyzer(df["body"].astype(str).tolist(), truncation=True)
+metrics.inc("articles_total", len(results), stage="sentiment")
+df["sentiment"] = [stars_to_sentiment(res) for res in results]
 
 print("\n🔹 Sentiment Distribution:\n", df["sentiment"].value_counts())
 
@@ -117,4 +109,5 @@ plt.close()
 # Save processed dataset
 # ---------------------------
 df.to_json(output_file, orient="records", force_ascii=False, indent=2)
-print(f"✅ Preprocessing complete! Processed dataset saved as {output_file}")
\ No newline at end of file
+print(f"✅ Preprocessing complete! Processed dataset saved as {output_file}")
+metrics.dump_report("preprocess_articles")
@@ -0,0 +1,85 @@
+"""
+sentiment_model.py
+Loads the multilingual sentiment model with a selectable inference backend.
+
+Backends (INSIGHTBOT_SENTIMENT_BACKEND):
+- fp32: the stock transformers pipeline (default)
+- int8: dynamic int8 quantization of the Linear layers (CPU, torch only)
+- onnx: ONNX Runtime via optimum; the exported model is cached in
+        INSIGHTBOT_ONNX_DIR and reused on later runs
+
+`benchmarks/compare_sentiment_backends.py` checks label agreement against the
+fp32 labels in the bundled dataset and compares latency/memory.
+"""
+
+import os
+from pathlib import Path
+
+# ---------------------------
+# Config
+# ---------------------------
+MODEL_NAME = "nlptown/bert-base-multilingual-uncased-sentiment"
+BACKENDS = ("fp32", "int8", "onnx")
+DEFAULT_BACKEND = os.environ.get("INSIGHTBOT_SENTIMENT_BACKEND", "fp32").lower()
+ONNX_DIR = Path(os.environ.get("INSIGHTBOT_ONNX_DIR", "models/sentiment_onnx"))
+
+# ---------------------------
+# Label mapping
+# ---------------------------
+def stars_to_sentiment(result: dict) -> str:
+    """Map a "N stars" prediction to negative / neutral / positive."""
+    stars = int(result["label"].split()[0])
+    if stars <= 2:
+        return "negative"
+    elif stars == 3:
+        return "neutral"
+    else:
+        return "positive"
+
+# ---------------------------
+# Loaders
+# ---------------------------
+# transformers is imported inside the loaders so processes that only talk to
+# sentiment_service.py never pay for it.
+def _load_fp32():
+    from transformers import pipeline
+
+    return pipeline("sentiment-analysis", model=MODEL_NAME)
+
+def _load_int8():
+    import torch
+    from torch.ao.quantization import quantize_dynamic
+    from transformers import pipeline
+
+    sentiment = pipeline("sentiment-analysis", model=MODEL_NAME)
+    sentiment.model = quantize_dynamic(sentiment.model, {torch.nn.Linear}, dtype=torch.qint8)
+    return sentiment
+
+def _load_onnx():
+    try:
+        from optimum.onnxruntime import ORTModelForSequenceClassification
+    except ImportError as e:
+        raise ImportError(
+            "The onnx sentiment backend needs `pip install optimum[onnxruntime]`"
+        ) from e
+    from transformers import AutoTokenizer, pipeline
+
+    if (ONNX_DIR / "model.onnx").exists():
+        model = ORTModelForSequenceClassification.from_pretrained(ONNX_DIR)
+        tokenizer = AutoTokenizer.from_pretrained(ONNX_DIR)
+    else:
+        print(f"🔹 Exporting {MODEL_NAME} to ONNX ({ONNX_DIR}) ...")
+        model = ORTModelForSequenceClassification.from_pretrained(MODEL_NAME, export=True)
+        tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+        model.save_pretrained(ONNX_DIR)
+        tokenizer.save_pretrained(ONNX_DIR)
+    return pipeline("sentiment-analysis", model=model, tokenizer=tokenizer)
+
+_LOADERS = {"fp32": _load_fp32, "int8": _load_int8, "onnx": _load_onnx}
+
+def load_sentiment_model(backend: str = None):
+    backend = (backend or DEFAULT_BACKEND).lower()
+    if backend not in _LOADERS:
+        raise ValueError(f"Unknown sentiment backend {backend!r}, expected one of {BACKENDS}")
+    print(f"🔹 Loading multilingual sentiment model ({backend})...")
+    return _LOADERS[backend]()
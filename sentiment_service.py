@@ -0,0 +1,217 @@
+"""
+sentiment_service.py
+Local sentiment inference service shared by all web workers / CLI runs.
+
+One process holds the model and listens on a Unix socket. Requests from all
+connected clients are queued and run together in micro-batches: the batcher
+waits at most BATCH_WINDOW_MS after the first queued text (or until
+MAX_BATCH_SIZE texts are waiting) before calling the model once.
+
+    python sentiment_service.py                 # start the service
+    INSIGHTBOT_SENTIMENT_SOCKET=/tmp/insightbot-sentiment.sock python app.py
+
+When INSIGHTBOT_SENTIMENT_SOCKET is set, `fetch_process_upload.analyze_sentiment`
+uses `SentimentClient` instead of loading its own copy of the model.
+
+Messages are length-prefixed JSON (never pickle), and the socket is created
+with mode 0660, so only the owner and group can reach the service.
+"""
+
+import argparse
+import json
+import os
+import queue
+import socket
+import struct
+import threading
+import time
+
+import metrics
+
+# ---------------------------
+# Config
+# ---------------------------
+SOCKET_PATH = os.environ.get("INSIGHTBOT_SENTIMENT_SOCKET", "/tmp/insightbot-sentiment.sock")
+BATCH_WINDOW_MS = float(os.environ.get("INSIGHTBOT_SENTIMENT_BATCH_WINDOW_MS", 10))
+MAX_BATCH_SIZE = int(os.environ.get("INSIGHTBOT_SENTIMENT_MAX_BATCH", 32))
+MAX_MESSAGE_BYTES = 16 * 2**20
+SOCKET_UMASK = 0o117  # socket file mode 0660
+
+# ---------------------------
+# Framing
+# ---------------------------
+_HEADER = struct.Struct("!I")
+
+def send_message(sock, obj):
+    data = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+def _recv_exactly(sock, size):
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = sock.recv(size - len(buf))
+        if not chunk:
+            raise EOFError("connection closed")
+        buf += chunk
+    return bytes(buf)
+
+def recv_message(sock):
+    (size,) = _HEADER.unpack(_recv_exactly(sock, _HEADER.size))
+    if size > MAX_MESSAGE_BYTES:
+        raise ValueError(f"message of {size} bytes exceeds {MAX_MESSAGE_BYTES}")
+    return json.loads(_recv_exactly(sock, size).decode("utf-8"))
+
+# ---------------------------
+# Server
+# ---------------------------
+class _Pending:
+    __slots__ = ("text", "done", "result")
+
+    def __init__(self, text):
+        self.text = text
+        self.done = threading.Event()
+        self.result = None
+
+class SentimentServer:
+    def __init__(self, model, address=SOCKET_PATH, window_ms=BATCH_WINDOW_MS,
+                 max_batch=MAX_BATCH_SIZE):
+        self.model = model
+        self.address = address
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.requests = queue.Queue()
+
+    def _batcher(self):
+        while True:
+            batch = [self.requests.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.requests.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            metrics.inc("sentiment_batches_total")
+            metrics.inc("sentiment_texts_total", len(batch))
+            try:
+                with metrics.timer("sentiment_seconds", backend="service"):
+                    results = self.model(
+                        [p.text for p in batch], truncation=True, batch_size=len(batch)
+                    )
+            except Exception as e:
+                results = [{"error": str(e)}] * len(batch)
+            for pending, result in zip(batch, results):
+                pending.result = result
+                pending.done.set()
+
+    def _serve_connection(self, conn):
+        with conn:
+            while True:
+                try:
+                    texts = recv_message(conn)
+                except (EOFError, OSError):
+                    return
+                except ValueError as e:  # bad framing or JSON: drop the client
+                    print(f"⚠️ Dropped a connection: {e}")
+                    return
+                if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+                    send_message(conn, [{"error": "expected a list of strings"}])
+                    continue
+                pending = [_Pending(t) for t in texts]
+                for p in pending:
+                    self.requests.put(p)
+                for p in pending:
+                    p.done.wait()
+                send_message(conn, [p.result for p in pending])
+
+    def _bind(self):
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # Set the mode at creation time; a chmod after bind() leaves a window
+        old_umask = os.umask(SOCKET_UMASK)
+        try:
+            sock.bind(self.address)
+        finally:
+            os.umask(old_umask)
+        sock.listen(128)
+        return sock
+
+    def serve_forever(self):
+        threading.Thread(target=self._batcher, daemon=True).start()
+        with self._bind() as listener:
+            print(f"✅ Sentiment service listening on {self.address} "
+                  f"(window {self.window * 1000:.0f} ms, max batch {self.max_batch})")
+            while True:
+                try:
+                    conn, _ = listener.accept()
+                except OSError as e:
+                    print(f"⚠️ Rejected a connection: {e}")
+                    continue
+                threading.Thread(target=self._serve_connection, args=(conn,), daemon=True).start()
+
+# ---------------------------
+# Client
+# ---------------------------
+class SentimentClient:
+    """Thread-safe client; each thread keeps its own connection to the service."""
+
+    def __init__(self, address=SOCKET_PATH):
+        self.address = address
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            conn.connect(self.address)
+            self._local.conn = conn
+        return conn
+
+    def predict(self, texts: list) -> list:
+        """Model outputs ({"label": "N stars", "score": ...}) for `texts`."""
+        for attempt in (1, 2):
+            try:
+                conn = self._connection()
+                send_message(conn, list(texts))
+                results = recv_message(conn)
+                break
+            except (EOFError, OSError):
+                conn = getattr(self._local, "conn", None)
+                if conn is not None:
+                    conn.close()
+                self._local.conn = None
+                if attempt == 2:
+                    raise
+        for r in results:
+            if "error" in r:
+                raise RuntimeError(f"Sentiment service error: {r['error']}")
+        return results
+
+    def __call__(self, texts, **_):
+        """Pipeline-compatible call signature."""
+        return self.predict([texts] if isinstance(texts, str) else texts)
+
+# ---------------------------
+# Run
+# ---------------------------
+if __name__ == "__main__":
+    from sentiment_model import load_sentiment_model
+
+    parser = argparse.ArgumentParser(description="InsightBot sentiment inference service")
+    parser.add_argument("--socket", default=SOCKET_PATH)
+    parser.add_argument("--backend", default=None, help="fp32 | int8 | onnx")
+    parser.add_argument("--window-ms", type=float, default=BATCH_WINDOW_MS)
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH_SIZE)
+    args = parser.parse_args()
+
+    server = SentimentServer(
+        load_sentiment_model(args.backend),
+        address=args.socket,
+        window_ms=args.window_ms,
+        max_batch=args.max_batch,
+    )
+    server.serve_forever()
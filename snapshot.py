@@ -0,0 +1,335 @@
+"""
+snapshot.py
+Read-only SQLite snapshot of the article dataset, for serving without MongoDB.
+
+Build it from the preprocessed dataset (or a Mongo export in the same format):
+
+    python snapshot.py --input data/preprocessed/articles_preprocessed.json \\
+                       --output data/snapshot/articles.sqlite
+
+Then start the app against it:
+
+    INSIGHTBOT_SNAPSHOT=data/snapshot/articles.sqlite python app.py
+
+The query functions mirror data_access.py (list_sources, find_by_source,
+sample_articles, count_articles, find_article, find_recent, iter_articles,
+search_articles, top_terms, find_by_topic, topic_summaries), so app.py can use either module as its store.
+The database is opened immutable and memory-mapped, and full-text search
+goes through an FTS5 index.
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import threading
+from datetime import timezone
+from pathlib import Path
+
+from dates import normalize_dates, parse_date
+from term_stats import article_day, full_months, tokenize
+from topics import assign_topics, load_doc_topics, load_topic_keywords, TOP_ARTICLES_PER_TOPIC
+
+# ---------------------------
+# Config
+# ---------------------------
+DATASET_PATH = Path("data/preprocessed/articles_preprocessed.json")
+SNAPSHOT_PATH = Path(os.environ.get("INSIGHTBOT_SNAPSHOT") or "data/snapshot/articles.sqlite")
+MMAP_SIZE = 256 * 2**20
+
+LIST_COLUMNS = ("title", "url", "language", "sentiment", "source")
+DETAIL_COLUMNS = ("title", "body", "source", "language", "sentiment", "date", "url")
+EXPORT_COLUMNS = ("url", "source", "title", "body", "language", "sentiment", "date", "author",
+                  "category", "tags", "summary", "length", "topic_lda", "topic_lda_prob")
+
+SCHEMA = """
+CREATE TABLE articles (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL,
+    source TEXT NOT NULL,
+    title TEXT,
+    body TEXT,
+    language TEXT,
+    sentiment TEXT,
+    date INTEGER,
+    author TEXT,
+    category TEXT,
+    tags TEXT,
+    summary TEXT,
+    length INTEGER,
+    topic_lda INTEGER,
+    topic_lda_prob REAL
+);
+CREATE INDEX articles_url ON articles (url);
+CREATE INDEX articles_source_date ON articles (source, date DESC);
+CREATE INDEX articles_date ON articles (date DESC);
+CREATE INDEX articles_topic_prob ON articles (topic_lda, topic_lda_prob DESC);
+CREATE TABLE topics (
+    topic INTEGER PRIMARY KEY, keywords TEXT, count INTEGER, top_articles TEXT
+);
+CREATE VIRTUAL TABLE articles_fts USING fts5(
+    title, body, content='articles', content_rowid='id', tokenize='unicode61'
+);
+CREATE TABLE term_counts (
+    language TEXT, source TEXT, day TEXT, term TEXT, count INTEGER,
+    PRIMARY KEY (language, source, day, term)
+) WITHOUT ROWID;
+CREATE INDEX term_counts_day ON term_counts (day);
+CREATE TABLE term_counts_monthly (
+    language TEXT, source TEXT, month TEXT, term TEXT, count INTEGER,
+    PRIMARY KEY (language, source, month, term)
+) WITHOUT ROWID;
+CREATE INDEX term_counts_monthly_month ON term_counts_monthly (month);
+"""
+
+# ---------------------------
+# Build
+# ---------------------------
+def build_snapshot(articles, output: Path):
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp = output.with_suffix(output.suffix + ".tmp")
+    if tmp.exists():
+        tmp.unlink()
+
+    articles = normalize_dates(list(articles))
+    assign_topics(articles, load_doc_topics())
+
+    conn = sqlite3.connect(tmp)
+    conn.executescript(SCHEMA)
+    terms = {}
+    count = 0
+    for art in articles:
+        conn.execute(
+            "INSERT INTO articles (url, source, title, body, language, sentiment, date,"
+            " author, category, tags, summary, length, topic_lda, topic_lda_prob)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                art.get("url", ""), art.get("source", ""), art.get("title", ""),
+                art.get("body", ""), art.get("language", ""), art.get("sentiment", ""),
+                _epoch_ms(art["date"]),
+                art.get("author", ""), art.get("category", ""),
+                json.dumps(art["tags"], ensure_ascii=False) if art.get("tags") is not None else None,
+                art.get("summary", ""), art.get("length"),
+                art.get("topic_lda"), art.get("topic_lda_prob"),
+            ),
+        )
+        bucket = (art.get("language") or "unknown", art.get("source") or "", article_day(art))
+        for term in tokenize(art.get("body", "")):
+            key = bucket + (term,)
+            terms[key] = terms.get(key, 0) + 1
+        count += 1
+
+    conn.execute("INSERT INTO articles_fts (articles_fts) VALUES ('rebuild')")
+    conn.executemany("INSERT INTO term_counts VALUES (?, ?, ?, ?, ?)",
+                     (k + (n,) for k, n in terms.items()))
+    monthly = {}
+    for (language, source, day, term), n in terms.items():
+        key = (language, source, day[:7], term)
+        monthly[key] = monthly.get(key, 0) + n
+    conn.executemany("INSERT INTO term_counts_monthly VALUES (?, ?, ?, ?, ?)",
+                     (k + (n,) for k, n in monthly.items()))
+    _build_topics(conn)
+    conn.commit()
+    conn.execute("VACUUM")
+    conn.close()
+    os.replace(tmp, output)
+    return count
+
+def _build_topics(conn):
+    keywords = load_topic_keywords()
+    counts = dict(conn.execute(
+        "SELECT topic_lda, COUNT(*) FROM articles WHERE topic_lda IS NOT NULL GROUP BY topic_lda"
+    ))
+    for topic in sorted(set(keywords) | set(counts)):
+        top = [
+            {"title": r[0], "url": r[1], "source": r[2], "topic_lda_prob": r[3]}
+            for r in conn.execute(
+                "SELECT title, url, source, topic_lda_prob FROM articles WHERE topic_lda = ?"
+                " ORDER BY topic_lda_prob DESC LIMIT ?", (topic, TOP_ARTICLES_PER_TOPIC))
+        ]
+        conn.execute("INSERT INTO topics VALUES (?, ?, ?, ?)", (
+            topic, json.dumps(keywords.get(topic, []), ensure_ascii=False),
+            counts.get(topic, 0), json.dumps(top, ensure_ascii=False),
+        ))
+
+def _epoch_ms(dt):
+    # Dates are stored as epoch milliseconds (naive datetimes are UTC)
+    return round(dt.replace(tzinfo=timezone.utc).timestamp() * 1000) if dt else None
+
+# ---------------------------
+# Read-only connection (one per thread)
+# ---------------------------
+_local = threading.local()
+
+def _conn():
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        if not SNAPSHOT_PATH.exists():
+            raise FileNotFoundError(f"❌ Snapshot not found: {SNAPSHOT_PATH} (run python snapshot.py)")
+        conn = sqlite3.connect(f"file:{SNAPSHOT_PATH}?mode=ro&immutable=1", uri=True,
+                               check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+        _local.conn = conn
+    return conn
+
+def _rows(sql, params=(), columns=LIST_COLUMNS):
+    return [{c: row[c] for c in columns} for row in _conn().execute(sql, params)]
+
+_LIST_SELECT = "SELECT " + ", ".join(LIST_COLUMNS) + " FROM articles"
+
+# ---------------------------
+# Queries (same names as data_access.py)
+# ---------------------------
+def list_sources() -> list:
+    return [r[0] for r in _conn().execute("SELECT DISTINCT source FROM articles ORDER BY source")]
+
+def find_by_source(source: str, page=0, page_size=0) -> list:
+    sql = _LIST_SELECT + " WHERE source = ? ORDER BY date DESC"
+    params = (source,)
+    if page_size:
+        sql += " LIMIT ? OFFSET ?"
+        params += (page_size, page * page_size)
+    return _rows(sql, params)
+
+def _date_clauses(date_from=None, date_to=None, column="date"):
+    clauses, params = [], []
+    if date_from:
+        clauses.append(f"{column} >= ?")
+        params.append(_epoch_ms(date_from))
+    if date_to:
+        clauses.append(f"{column} <= ?")
+        params.append(_epoch_ms(date_to))
+    return clauses, params
+
+def find_recent(source=None, date_from=None, date_to=None, limit=30) -> list:
+    clauses, params = _date_clauses(date_from, date_to)
+    if source:
+        clauses.append("source = ?")
+        params.append(source)
+    where = " WHERE " + " AND ".join(clauses) if clauses else ""
+    return _rows(_LIST_SELECT + where + " ORDER BY date DESC LIMIT ?", params + [limit])
+
+def count_articles() -> int:
+    return _conn().execute("SELECT MAX(id) FROM articles").fetchone()[0] or 0
+
+def iter_articles(fields, source=None, language=None, sentiment=None,
+                  date_from=None, date_to=None, limit=0, batch_size=1000):
+    """Lazily yield matching articles (newest first) with only `fields`."""
+    columns = [f for f in fields if f in EXPORT_COLUMNS]
+    clauses, params = _date_clauses(date_from, date_to)
+    for column, value in (("source", source), ("language", language), ("sentiment", sentiment)):
+        if value:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    where = " WHERE " + " AND ".join(clauses) if clauses else ""
+    sql = f"SELECT {', '.join(columns) or 'id'} FROM articles{where} ORDER BY date DESC"
+    if limit:
+        sql += " LIMIT ?"
+        params.append(limit)
+    cursor = _conn().execute(sql, params)
+    cursor.arraysize = batch_size
+    while True:
+        rows = cursor.fetchmany()
+        if not rows:
+            return
+        for row in rows:
+            art = dict.fromkeys(fields)
+            art.update((c, row[c]) for c in columns)
+            if art.get("date") is not None:
+                art["date"] = parse_date(art["date"])
+            if art.get("tags") is not None:
+                art["tags"] = json.loads(art["tags"])
+            yield art
+
+def sample_articles(size: int) -> list:
+    # ids are dense (1..N) because the snapshot is written once and never edited
+    total = count_articles()
+    ids = random.sample(range(1, total + 1), min(size, total))
+    if not ids:
+        return []
+    marks = ",".join("?" * len(ids))
+    return _rows(_LIST_SELECT + f" WHERE id IN ({marks})", ids)
+
+def find_article(url: str, projection=None):
+    rows = _rows("SELECT " + ", ".join(DETAIL_COLUMNS) + " FROM articles WHERE url = ? LIMIT 1",
+                 (url,), DETAIL_COLUMNS)
+    return rows[0] if rows else None
+
+def search_articles(query: str, source=None, limit=30, date_from=None, date_to=None) -> list:
+    # Quote each word so user input is never parsed as FTS5 syntax
+    words = [w.replace('"', '""') for w in query.split()]
+    if not words:
+        return []
+    match = " ".join(f'"{w}"' for w in words)
+    sql = ("SELECT " + ", ".join(f"a.{c}" for c in LIST_COLUMNS) +
+           " FROM articles_fts JOIN articles a ON a.id = articles_fts.rowid"
+           " WHERE articles_fts MATCH ?")
+    params = [match]
+    if source:
+        sql += " AND a.source = ?"
+        params.append(source)
+    clauses, date_params = _date_clauses(date_from, date_to, column="a.date")
+    for clause in clauses:
+        sql += " AND " + clause
+    params.extend(date_params)
+    sql += " ORDER BY bm25(articles_fts) LIMIT ?"
+    params.append(limit)
+    return _rows(sql, params)
+
+def _term_rows(table, conditions):
+    clauses, params = [], []
+    for column, op, value in conditions:
+        if value:
+            clauses.append(f"{column} {op} ?")
+            params.append(value)
+    where = " WHERE " + " AND ".join(clauses) if clauses else ""
+    return f"SELECT term, count FROM {table}{where}", params
+
+def top_terms(n=50, language=None, source=None, day_from=None, day_to=None) -> list:
+    """Top-N terms; whole months come from term_counts_monthly (see term_stats)."""
+    slice_ = [("language", "=", language), ("source", "=", source)]
+    days = [("day", ">=", day_from), ("day", "<=", day_to)]
+    months = full_months(day_from, day_to)
+    if months is None:
+        parts = [_term_rows("term_counts", slice_ + days)]
+    else:
+        first, last = months
+        parts = [_term_rows("term_counts_monthly",
+                            slice_ + [("month", ">=", first), ("month", "<=", last)])]
+        # Partial months at the ends of the range come from the daily buckets
+        if day_from and first != day_from[:7]:
+            parts.append(_term_rows("term_counts", slice_ + days + [("day", "<", first + "-01")]))
+        if day_to and last != day_to[:7]:
+            parts.append(_term_rows("term_counts", slice_ + days + [("day", ">", last + "-31")]))
+    union = " UNION ALL ".join(sql for sql, _ in parts)
+    params = [p for _, part_params in parts for p in part_params]
+    sql = (f"SELECT term, SUM(count) AS count FROM ({union})"
+           " GROUP BY term ORDER BY count DESC, term LIMIT ?")
+    return [{"term": r[0], "count": r[1]} for r in _conn().execute(sql, params + [n])]
+
+def find_by_topic(topic: int, page=0, page_size=20) -> list:
+    return _rows(_LIST_SELECT + " WHERE topic_lda = ? ORDER BY topic_lda_prob DESC LIMIT ? OFFSET ?",
+                 (topic, page_size, page * page_size))
+
+def topic_summaries() -> list:
+    return [
+        {"topic": r[0], "keywords": json.loads(r[1]), "count": r[2], "top_articles": json.loads(r[3])}
+        for r in _conn().execute("SELECT topic, keywords, count, top_articles FROM topics ORDER BY topic")
+    ]
+
+# ---------------------------
+# Run
+# ---------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the read-only article snapshot")
+    parser.add_argument("--input", type=Path, default=DATASET_PATH)
+    parser.add_argument("--output", type=Path, default=SNAPSHOT_PATH)
+    args = parser.parse_args()
+
+    with open(args.input, "r", encoding="utf-8") as f:
+        articles = json.load(f)
+    count = build_snapshot(articles, args.output)
+    size_kib = args.output.stat().st_size / 1024
+    print(f"✅ Snapshot with {count} articles saved to {args.output} ({size_kib:.0f} KiB)")
@@ -0,0 +1,234 @@
+"""
+term_stats.py
+Incrementally maintained term frequencies per language / source / day.
+
+Each (language, source, day) bucket is a single document in the
+`term_counts` collection holding a `terms` map of word -> count. Buckets are
+updated with `$inc` as articles are ingested, so top-N terms for any slice
+(word clouds included) come from the summary collection instead of a scan
+over article bodies.
+
+The same counts are also rolled up per (language, source, month) in
+`term_counts_monthly`. `top_terms_pipeline` reads whole months from the rollup and
+only the partial months at either end of a range from the daily buckets, so
+wide or unbounded slices unwind a few dozen documents instead of one per day.
+
+Run directly to rebuild the summary collection from the articles collection.
+"""
+
+import re
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta, timezone
+
+from pymongo import UpdateOne, ASCENDING
+
+from dates import parse_date
+
+# ---------------------------
+# Config
+# ---------------------------
+TERMS_COLLECTION = "term_counts"
+MONTHLY_TERMS_COLLECTION = "term_counts_monthly"
+
+MIN_TERM_LENGTH = 3
+
+STOPWORDS = {
+    # English
+    "about", "above", "after", "again", "against", "all", "also", "and", "any",
+    "are", "because", "been", "before", "being", "below", "between", "both",
+    "but", "can", "could", "did", "does", "doing", "down", "during", "each",
+    "even", "few", "for", "from", "further", "had", "has", "have", "having",
+    "her", "here", "hers", "herself", "him", "himself", "his", "how", "into",
+    "its", "itself", "just", "like", "more", "most", "much", "new", "not", "now",
+    "off", "once", "one", "only", "other", "our", "ours", "ourselves", "out",
+    "over", "own", "said", "same", "says", "she", "should", "some", "such",
+    "than", "that", "the", "their", "theirs", "them", "themselves", "then",
+    "there", "these", "they", "this", "those", "through", "too", "two", "under",
+    "until", "very", "was", "way", "were", "what", "when", "where", "which",
+    "while", "who", "whom", "why", "will", "with", "would", "year", "years",
+    "you", "your", "yours", "yourself", "yourselves", "may", "many", "make",
+    "made", "get", "got", "told", "according", "people", "time",
+    # Russian
+    "и", "в", "во", "не", "что", "он", "на", "я", "с", "со", "как", "а", "то",
+    "все", "она", "так", "его", "но", "да", "ты", "к", "у", "же", "вы", "за",
+    "бы", "по", "только", "ее", "мне", "было", "вот", "от", "меня", "еще",
+    "нет", "о", "из", "ему", "теперь", "когда", "даже", "ну", "ли", "если",
+    "уже", "или", "ни", "быть", "был", "него", "до", "вас", "нибудь", "уж",
+    "вам", "сказал", "ведь", "там", "потом", "себя", "ничего", "ей", "может",
+    "они", "тут", "где", "есть", "надо", "ней", "для", "мы", "тебя", "их",
+    "чем", "была", "сам", "чтоб", "без", "будто", "чего", "раз", "тоже",
+    "себе", "под", "будет", "тогда", "кто", "этот", "того", "потому", "этого",
+    "какой", "совсем", "ним", "здесь", "этом", "один", "почти", "мой", "тем",
+    "чтобы", "нее", "были", "куда", "зачем", "всех", "можно", "при", "об",
+    "это", "также", "которые", "который", "года",
+}
+
+WORD_RE = re.compile(r"[^\W\d_]+")
+
+# ---------------------------
+# Tokenizing
+# ---------------------------
+def tokenize(text: str) -> list:
+    """Lowercased words with stopwords and short tokens removed."""
+    if not isinstance(text, str):
+        return []
+    return [
+        w for w in WORD_RE.findall(text.lower())
+        if len(w) >= MIN_TERM_LENGTH and w not in STOPWORDS
+    ]
+
+def term_frequencies(texts) -> Counter:
+    counts = Counter()
+    for text in texts:
+        counts.update(tokenize(text))
+    return counts
+
+def article_day(article: dict, fetched_at=None) -> str:
+    """UTC day (YYYY-MM-DD) of an article, falling back to the fetch time."""
+    dt = parse_date(article.get("date")) or parse_date(fetched_at or datetime.now(timezone.utc))
+    return dt.strftime("%Y-%m-%d")
+
+def full_months(day_from=None, day_to=None):
+    """(first, last) YYYY-MM of the months lying wholly inside a day range.
+
+    Either end is None when the range is open on that side. Returns None when
+    the range covers no whole month, so only daily buckets apply.
+    """
+    first = last = None
+    if day_from:
+        first = day_from[:7]
+        if day_from[8:] != "01":
+            year, month = int(first[:4]), int(first[5:])
+            first = f"{year + month // 12:04d}-{month % 12 + 1:02d}"
+    if day_to:
+        last = day_to[:7]
+        next_day = date.fromisoformat(day_to) + timedelta(days=1)
+        if next_day.day != 1:
+            year, month = int(last[:4]), int(last[5:])
+            last = f"{year - (month == 1):04d}-{(month - 2) % 12 + 1:02d}"
+    if first and last and first > last:
+        return None
+    return first, last
+
+def range_match(field, low=None, high=None) -> dict:
+    """`{field: {"$gte": low, "$lte": high}}` for the bounds that are set."""
+    bounds = {}
+    if low:
+        bounds["$gte"] = low
+    if high:
+        bounds["$lte"] = high
+    return {field: bounds} if bounds else {}
+
+# ---------------------------
+# Summary collection
+# ---------------------------
+def ensure_term_indexes(db):
+    terms = db[TERMS_COLLECTION]
+    terms.create_index(
+        [("language", ASCENDING), ("source", ASCENDING), ("day", ASCENDING)],
+        unique=True,
+    )
+    terms.create_index([("source", ASCENDING), ("day", ASCENDING)])
+    terms.create_index([("day", ASCENDING)])
+    monthly = db[MONTHLY_TERMS_COLLECTION]
+    monthly.create_index(
+        [("language", ASCENDING), ("source", ASCENDING), ("month", ASCENDING)],
+        unique=True,
+    )
+    monthly.create_index([("source", ASCENDING), ("month", ASCENDING)])
+    monthly.create_index([("month", ASCENDING)])
+
+def update_term_counts(db, articles, fetched_at=None) -> int:
+    """Add the terms of `articles` to their day and month buckets. Returns day buckets touched."""
+    buckets = defaultdict(Counter)
+    for art in articles:
+        key = (
+            art.get("language") or "unknown",
+            art.get("source") or "",
+            article_day(art, fetched_at),
+        )
+        buckets[key]["articles"] += 1
+        buckets[key].update(f"terms.{t}" for t in tokenize(art.get("body", "")))
+
+    months = defaultdict(Counter)
+    for (language, source, day), counts in buckets.items():
+        months[(language, source, day[:7])].update(counts)
+
+    ops = [
+        UpdateOne(
+            {"language": language, "source": source, "day": day},
+            {"$inc": dict(counts)},
+            upsert=True,
+        )
+        for (language, source, day), counts in buckets.items()
+    ]
+    monthly_ops = [
+        UpdateOne(
+            {"language": language, "source": source, "month": month},
+            {"$inc": dict(counts)},
+            upsert=True,
+        )
+        for (language, source, month), counts in months.items()
+    ]
+    if ops:
+        db[TERMS_COLLECTION].bulk_write(ops, ordered=False)
+        db[MONTHLY_TERMS_COLLECTION].bulk_write(monthly_ops, ordered=False)
+    return len(buckets)
+
+def top_terms_pipeline(n=50, language=None, source=None, day_from=None, day_to=None):
+    """(collection name, aggregation pipeline) computing the top-N terms of a slice,
+    from the month and day buckets only (run by `data_access.top_terms`)."""
+    match = {}
+    if language:
+        match["language"] = language
+    if source:
+        match["source"] = source
+    days = range_match("day", day_from, day_to)
+
+    months = full_months(day_from, day_to)
+    if months is None:
+        collection = TERMS_COLLECTION
+        pipeline = [{"$match": dict(match, **days)}]
+    else:
+        first, last = months
+        collection = MONTHLY_TERMS_COLLECTION
+        pipeline = [{"$match": dict(match, **range_match("month", first, last))}]
+        # Partial months at the ends of the range come from the daily buckets
+        edges = []
+        if day_from and first != day_from[:7]:
+            edges.append({"day": {"$lt": first + "-01"}})
+        if day_to and last != day_to[:7]:
+            edges.append({"day": {"$gt": last + "-31"}})
+        if edges:
+            pipeline.append({"$unionWith": {
+                "coll": TERMS_COLLECTION,
+                "pipeline": [{"$match": dict(match, **days, **{"$or": edges})}],
+            }})
+
+    pipeline += [
+        {"$project": {"_id": 0, "terms": {"$objectToArray": "$terms"}}},
+        {"$unwind": "$terms"},
+        {"$group": {"_id": "$terms.k", "count": {"$sum": "$terms.v"}}},
+        {"$sort": {"count": -1, "_id": 1}},
+        {"$limit": n},
+    ]
+    return collection, pipeline
+
+def rebuild_term_counts(db, articles) -> int:
+    db[TERMS_COLLECTION].drop()
+    db[MONTHLY_TERMS_COLLECTION].drop()
+    ensure_term_indexes(db)
+    return update_term_counts(db, articles)
+
+# ---------------------------
+# Run
+# ---------------------------
+if __name__ == "__main__":
+    import data_access
+
+    db = data_access.get_db()
+    cursor = data_access.get_collection().find(
+        {}, {"body": 1, "language": 1, "source": 1, "date": 1, "_id": 0}
+    )
+    buckets = rebuild_term_counts(db, cursor)
+    print(f"✅ Rebuilt {TERMS_COLLECTION}: {buckets} language/source/day buckets")
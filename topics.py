@@ -0,0 +1,185 @@
+"""
+topics.py
+LDA topic assignments on articles and precomputed per-topic summaries.
+
+- Articles carry `topic_lda` / `topic_lda_prob`, indexed together so a topic
+  page is one index range scan sorted by probability.
+- `topic_stats` holds one document per topic: keywords, article count and the
+  top articles by probability. It is refreshed for the touched topics on every
+  ingest, so the topic facet never joins the CSV at request time.
+- New English articles are assigned a topic with the saved CountVectorizer and
+  LDA model (data/preprocessed/*_en_*.joblib).
+
+Run directly to backfill topic fields from the latest doc_topic_map CSV and
+rebuild topic_stats.
+"""
+
+import csv
+import json
+import re
+from pathlib import Path
+
+from pymongo import UpdateOne
+
+import metrics
+from term_stats import MIN_TERM_LENGTH, STOPWORDS
+
+# ---------------------------
+# Config
+# ---------------------------
+PREPROCESSED_DIR = Path("data/preprocessed")
+TOPIC_STATS_COLLECTION = "topic_stats"
+TOP_ARTICLES_PER_TOPIC = 10
+
+_models = None
+_keywords = None
+
+def _latest(pattern):
+    """Newest artifact for a glob (file names end in a sortable timestamp)."""
+    matches = sorted(PREPROCESSED_DIR.glob(pattern))
+    return matches[-1] if matches else None
+
+# ---------------------------
+# Artifacts
+# ---------------------------
+def load_topic_keywords() -> dict:
+    """{topic id: [keywords]} from the latest topics_lda_en_*.json."""
+    global _keywords
+    if _keywords is None:
+        path = _latest("topics_lda_en_*.json")
+        _keywords = {}
+        if path:
+            with open(path, "r", encoding="utf-8") as f:
+                topics = json.load(f)["topics"]
+            _keywords = {int(k.split("_")[-1]): words for k, words in topics.items()}
+    return _keywords
+
+def load_doc_topics(path=None) -> dict:
+    """{url: (topic, probability)} from the latest doc_topic_map_en_*.csv."""
+    path = path or _latest("doc_topic_map_en_*.csv")
+    if not path:
+        return {}
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return {
+            row["url"]: (int(row["topic_lda"]), float(row["topic_lda_prob"]))
+            for row in csv.DictReader(f)
+        }
+
+def _load_models():
+    global _models
+    if _models is None:
+        vec_path, lda_path = _latest("countvec_en_*.joblib"), _latest("lda_model_en_*.joblib")
+        _models = ()
+        if vec_path and lda_path:
+            try:
+                import joblib
+
+                _models = (joblib.load(vec_path), joblib.load(lda_path))
+            except Exception as e:
+                # Unpickling depends on the installed scikit-learn; never retry per batch
+                metrics.inc("topic_inference_errors_total", stage="load")
+                print(f"⚠️ LDA models could not be loaded, new articles get no topic: {e}")
+    return _models
+
+def _normalize(text: str) -> str:
+    # Same shape as corpus_en.txt, which the vectorizer was fitted on
+    return re.sub(r"\s+", " ", re.sub(r"[^a-z0-9\s]", " ", text.lower())).strip()
+
+# ---------------------------
+# Assignment
+# ---------------------------
+def assign_topics(records, doc_topics=None) -> set:
+    """Set topic_lda/topic_lda_prob on English records. Returns the topics used.
+
+    Known URLs take their topic from `doc_topics` (the CSV map); the rest are
+    inferred with the saved LDA model when it is available. Inference errors
+    are logged and leave those records without a topic, so ingestion never
+    fails because of the model.
+    """
+    doc_topics = doc_topics or {}
+    pending = []
+    for rec in records:
+        if rec.get("language") != "en":
+            continue
+        known = doc_topics.get(rec.get("url"))
+        if known:
+            rec["topic_lda"], rec["topic_lda_prob"] = known
+        else:
+            pending.append(rec)
+
+    models = _load_models() if pending else ()
+    if models:
+        vectorizer, lda = models
+        try:
+            dist = lda.transform(vectorizer.transform([_normalize(r.get("body", "")) for r in pending]))
+        except Exception as e:
+            metrics.inc("topic_inference_errors_total", stage="transform")
+            print(f"⚠️ Topic inference failed for {len(pending)} articles: {e}")
+            dist = []
+        for rec, row in zip(pending, dist):
+            topic = int(row.argmax())
+            rec["topic_lda"], rec["topic_lda_prob"] = topic, float(row[topic])
+
+    return {r["topic_lda"] for r in records if "topic_lda" in r}
+
+def apply_topic_map(collection, doc_topics) -> int:
+    """Backfill topic fields on stored articles from a {url: (topic, prob)} map."""
+    ops = [
+        UpdateOne({"url": url}, {"$set": {"topic_lda": topic, "topic_lda_prob": prob}})
+        for url, (topic, prob) in doc_topics.items()
+    ]
+    if not ops:
+        return 0
+    return collection.bulk_write(ops, ordered=False).modified_count
+
+# ---------------------------
+# Per-topic summaries
+# ---------------------------
+def refresh_topic_stats(db, collection, topics=None):
+    """Recompute topic_stats for `topics` (all topics when None)."""
+    keywords = load_topic_keywords()
+    if topics is None:
+        topics = set(keywords) | set(collection.distinct("topic_lda"))
+
+    stats = db[TOPIC_STATS_COLLECTION]
+    for topic in topics:
+        count = collection.count_documents({"topic_lda": topic})
+        top = list(collection.find(
+            {"topic_lda": topic},
+            {"title": 1, "url": 1, "source": 1, "topic_lda_prob": 1, "_id": 0},
+        ).sort("topic_lda_prob", -1).limit(TOP_ARTICLES_PER_TOPIC))
+        stats.replace_one(
+            {"_id": topic},
+            {"_id": topic, "keywords": keywords.get(topic, []), "count": count, "top_articles": top},
+            upsert=True,
+        )
+
+def topic_label(topic, keywords=None, n=3) -> str:
+    """Display label such as 'Topic 5: apple, iphone' (stopword keywords skipped)."""
+    words = [
+        w for w in (keywords or load_topic_keywords()).get(topic, [])
+        if len(w) >= MIN_TERM_LENGTH and w not in STOPWORDS
+    ][:n]
+    return f"Topic {topic}" + (f": {', '.join(words)}" if words else "")
+
+# ---------------------------
+# Run
+# ---------------------------
+if __name__ == "__main__":
+    import data_access
+
+    db = data_access.get_db()
+    collection = data_access.get_collection()
+    data_access.ensure_indexes()
+    updated = apply_topic_map(collection, load_doc_topics())
+
+    # English articles the CSV does not cover get a topic from the LDA model
+    missing = list(collection.find(
+        {"language": "en", "topic_lda": {"$exists": False}}, {"url": 1, "body": 1, "language": 1}
+    ))
+    assign_topics(missing)
+    inferred = {a["url"]: (a["topic_lda"], a["topic_lda_prob"]) for a in missing if "topic_lda" in a}
+    updated += apply_topic_map(collection, inferred)
+
+    refresh_topic_stats(db, collection)
+    print(f"✅ Topic fields set on {updated} articles; {TOPIC_STATS_COLLECTION} rebuilt")
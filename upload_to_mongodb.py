@@ -1,20 +1,23 @@
 import json
-from pymongo import MongoClient
+
+import data_access
+import metrics
+from dates import normalize_dates
+from term_stats import rebuild_term_counts, TERMS_COLLECTION
+from topics import assign_topics, load_doc_topics, refresh_topic_stats, TOPIC_STATS_COLLECTION
 
 # ---------------------------
 # Config
 # ---------------------------
-MONGO_URI = "mongodb://localhost:27017"   # Change if using Atlas or remote Mongo
-DB_NAME = "insightbot"
-COLLECTION_NAME = "articles"
+# MongoDB connection settings (MONGO_URI, INSIGHTBOT_DB, pool size) are read
+# from the environment by data_access.py
 DATASET_PATH = "data/preprocessed/articles_preprocessed.json"
 
 # ---------------------------
 # Connect to MongoDB
 # ---------------------------
-client = MongoClient(MONGO_URI)
-db = client[DB_NAME]
-collection = db[COLLECTION_NAME]
+db = data_access.get_db()
+collection = data_access.get_collection()
 
 # ---------------------------
 # Load dataset
@@ -24,6 +27,12 @@ with open(DATASET_PATH, "r", encoding="utf-8") as f:
 
 print(f"Loaded {len(articles)} articles from {DATASET_PATH}")
 
+# Dates as BSON datetimes (ms timestamps / ISO strings in the JSON; load time if missing)
+normalize_dates(articles)
+
+# LDA topic per article (from doc_topic_map CSV, inferred for unmapped ones)
+assign_topics(articles, load_doc_topics())
+
 # ---------------------------
 # Insert into MongoDB
 # ---------------------------
@@ -31,6 +40,22 @@ print(f"Loaded {len(articles)} articles from {DATASET_PATH}")
 collection.drop()
 
 # Insert all articles
-result = collection.insert_many(articles)
+with metrics.timer("mongo_query_seconds", op="insert_many"):
+    result = collection.insert_many(articles)
+
+print(f"✅ Inserted {len(result.inserted_ids)} articles into {db.name}.{collection.name}")
+
+# Indexes backing the web app's queries (dropped with the collection)
+data_access.ensure_indexes(force=True)
+
+# Term frequencies per language/source/day (for word clouds / top terms)
+with metrics.timer("term_counts_rebuild_seconds"):
+    buckets = rebuild_term_counts(db, articles)
+print(f"✅ Rebuilt {TERMS_COLLECTION} with {buckets} language/source/day buckets")
+
+# Per-topic counts / top articles for the topic facet
+db[TOPIC_STATS_COLLECTION].drop()
+refresh_topic_stats(db, collection)
+print(f"✅ Rebuilt {TOPIC_STATS_COLLECTION}")
 
-print(f"✅ Inserted {len(result.inserted_ids)} articles into {DB_NAME}.{COLLECTION_NAME}")
+metrics.dump_report("upload_to_mongodb")